@@ -1,11 +1,24 @@
 from helium import *
 from selenium import webdriver
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 import pandas as pd
+import os
+import sys
+
+# The v1 scripts reuse the browser helpers that live in v2/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "v2"))
+from driver_provision import resolve_driver
+from keywords import KeywordClassifier
+from memory_governor import MemoryGovernor
+
+classifier = KeywordClassifier()
+
+# One browser runs all 27 letters, so it is restarted between companies
+# once it holds too much memory or has loaded too many pages
+governor = MemoryGovernor(max_memory_mb=1500, max_navigations=2000)
 
 # def start_edge_with_helium():
 #     options = webdriver.EdgeOptions()
@@ -21,12 +34,25 @@ def start_edge_with_helium(headless=True):
     prefs = {"profile.managed_default_content_settings.images": 2}
     options.add_experimental_option("prefs", prefs)
     
-    service = webdriver.EdgeService(executable_path=EdgeChromiumDriverManager().install())
+    service = webdriver.EdgeService(executable_path=resolve_driver())  # Cached after the first run
     driver = webdriver.Edge(service=service, options=options)
     set_driver(driver)
 
+def visit(url):
+    go_to(url)
+    governor.navigated(get_driver())
+
+def restart_browser_if_due():
+    driver = get_driver()
+    if governor.driver_due(driver) is None:
+        return
+    print(f"Restarting the browser after {governor.status(driver)}")
+    governor.forget(driver)
+    kill_browser()
+    start_edge_with_helium()
+
 def extract_company_links(page_url):
-    go_to(page_url)
+    visit(page_url)
     try:
         WebDriverWait(get_driver(), 30).until(
             EC.presence_of_element_located((By.ID, "pcd_top_title"))
@@ -52,7 +78,7 @@ def navigate_and_extract(letter):
     return urls
 
 def check_company_status(company_url):
-    go_to(company_url)
+    visit(company_url)
     try:
         title = WebDriverWait(get_driver(), 10).until(
             EC.presence_of_element_located((By.TAG_NAME, "title"))
@@ -63,20 +89,15 @@ def check_company_status(company_url):
     return is_active
 
 def get_job_keywords(company_url):
-    go_to(company_url)
+    visit(company_url)
     job_keywords = {"Data": False, "Devops": False, "SRE": False, "Analytics": False}
     try:
         job_listings = find_all(S('.JobTile___StyledJobLink-sc-989ef686-0'))
         for listing in job_listings:
-            job_title = listing.web_element.text.lower()  # Convert to lower case for case-insensitive comparison
-            if "data" in job_title:
-                job_keywords["Data"] = True
-            if "devops" in job_title:
-                job_keywords["Devops"] = True
-            if "sre" in job_title or "site reliability" in job_title:
-                job_keywords["SRE"] = True
-            if "analytics" in job_title:
-                job_keywords["Analytics"] = True
+            job_title = listing.web_element.text
+            # Whole words only, so "sre" no longer matches "pressure"
+            for keyword in classifier.matches(job_title):
+                job_keywords[keyword] = True
     except TimeoutException:
         print(f"Timeout occurred while trying to access {company_url}")
     return job_keywords
@@ -93,6 +114,7 @@ if __name__ == '__main__':
         print(f"Processing letter: {letter.upper()}")
         company_urls = navigate_and_extract(letter)
         for url in company_urls:
+            restart_browser_if_due()
             status = check_company_status(url)
             if status:  # Only parse job listings if the company page exists
                 job_keywords = get_job_keywords(url)
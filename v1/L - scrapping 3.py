@@ -1,12 +1,20 @@
 from helium import *
 from selenium import webdriver
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
+import os
+import sys
+
+# The v1 scripts reuse the browser helpers that live in v2/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "v2"))
+from driver_provision import resolve_driver
+from keywords import KeywordClassifier
+
+classifier = KeywordClassifier()
 
 def start_edge_with_helium(headless=True):
     options = webdriver.EdgeOptions()
@@ -16,7 +24,7 @@ def start_edge_with_helium(headless=True):
     prefs = {"profile.managed_default_content_settings.images": 2}
     options.add_experimental_option("prefs", prefs)
     
-    service = webdriver.EdgeService(executable_path=EdgeChromiumDriverManager().install())
+    service = webdriver.EdgeService(executable_path=resolve_driver())  # Cached after the first run
     driver = webdriver.Edge(service=service, options=options)
     set_driver(driver)
 
@@ -63,15 +71,10 @@ def get_job_keywords(company_url):
     try:
         job_listings = find_all(S('.JobTile___StyledJobLink-sc-989ef686-0'))
         for listing in job_listings:
-            job_title = listing.web_element.text.lower()
-            if "data" in job_title:
-                job_keywords["Data"] = True
-            if "devops" in job_title:
-                job_keywords["Devops"] = True
-            if "sre" in job_title or "site reliability" in job_title:
-                job_keywords["SRE"] = True
-            if "analytics" in job_title:
-                job_keywords["Analytics"] = True
+            job_title = listing.web_element.text
+            # Whole words only, so "sre" no longer matches "pressure"
+            for keyword in classifier.matches(job_title):
+                job_keywords[keyword] = True
     except TimeoutException:
         print(f"Timeout occurred while trying to access {company_url}")
     return job_keywords
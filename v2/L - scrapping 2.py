@@ -1,24 +1,48 @@
 from helium import *
 from selenium import webdriver
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 import pandas as pd
+from driver_pool import FAST_START_ARGUMENTS, block_requests, blocked_urls
+from driver_provision import resolve_driver
+from keywords import KeywordClassifier
+from memory_governor import MemoryGovernor
+
+classifier = KeywordClassifier()
+# One browser runs the whole crawl, so it is restarted between companies
+# once it holds too much memory or has loaded too many pages
+governor = MemoryGovernor(max_memory_mb=1500, max_navigations=2000)
 
 def start_edge_with_helium(headless=True):
     options = webdriver.EdgeOptions()
+    for argument in FAST_START_ARGUMENTS:
+        options.add_argument(argument)
     if headless:
         options.add_argument("--headless")
     prefs = {"profile.managed_default_content_settings.images": 2}
     options.add_experimental_option("prefs", prefs)   
-    service = webdriver.EdgeService(executable_path=EdgeChromiumDriverManager().install())
+    service = webdriver.EdgeService(executable_path=resolve_driver())  # Cached after the first run
     driver = webdriver.Edge(service=service, options=options)
+    block_requests(driver, blocked_urls())  # Fonts, CSS, media and analytics are never downloaded
     set_driver(driver)
 
+def visit(url):
+    go_to(url)
+    governor.navigated(get_driver())
+
+def restart_browser_if_due(headless=True):
+    driver = get_driver()
+    if governor.driver_due(driver) is None:
+        return
+    print(f"Restarting the browser after {governor.status(driver)}")
+    governor.forget(driver)
+    kill_browser()
+    start_edge_with_helium(headless)
+
 def extract_company_links(page_url):
-    go_to(page_url)
+    visit(page_url)
     try:
         WebDriverWait(get_driver(), 30).until(
             EC.presence_of_element_located((By.ID, "pcd_top_title"))
@@ -44,8 +68,8 @@ def navigate_and_extract(letter):
     return urls
 
 def check_status_and_extract_keywords(company_url):
-    go_to(company_url)
-    job_keywords = {"Data": False, "Devops": False, "SRE": False, "Analytics": False}
+    visit(company_url)
+    job_keywords = dict.fromkeys(classifier.keywords, False)
     is_active = False
     locations = []  # Store each job's location
     contract_types = []  # Store each job's contract type
@@ -54,7 +78,7 @@ def check_status_and_extract_keywords(company_url):
 
     while has_next_page:
         current_page_url = f"{company_url}?page={page_num}"
-        go_to(current_page_url)
+        visit(current_page_url)
 
         try:
             title = WebDriverWait(get_driver(), 10).until(
@@ -75,15 +99,8 @@ def check_status_and_extract_keywords(company_url):
                             contract_type = text_elements[1].web_element.text.strip() if len(text_elements) >= 2 else "Unknown"
                             contract_types.append(contract_type)
 
-                            job_title = listing.web_element.text.lower()
-                            if "data" in job_title or "données" in job_title:
-                                job_keywords["Data"] = True
-                            if "devops" in job_title:
-                                job_keywords["Devops"] = True
-                            if "sre" in job_title or "site reliability" in job_title:
-                                job_keywords["SRE"] = True
-                            if "analytics" in job_title:
-                                job_keywords["Analytics"] = True
+                            for keyword in classifier.matches(listing.web_element.text):
+                                job_keywords[keyword] = True
 
                 # Check for the next page link by its aria-label
                 next_page_elements = find_all(S('[aria-label="Next page"]'))
@@ -109,6 +126,7 @@ if __name__ == '__main__':
         print(f"Processing letter: {letter.upper()}")
         company_urls = navigate_and_extract(letter)
         for url in company_urls:
+            restart_browser_if_due(headless=True)
             status, job_keywords, locations, contract_types = check_status_and_extract_keywords(url)
             
             # Check if any job keyword is True
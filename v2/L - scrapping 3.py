@@ -1,148 +1,487 @@
-from helium import *
-from selenium import webdriver
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import pandas as pd
-
-def start_edge_with_helium(headless=True):
-    options = webdriver.EdgeOptions()
-    if headless:
-        options.add_argument("--headless")
-    prefs = {"profile.managed_default_content_settings.images": 2}
-    options.add_experimental_option("prefs", prefs)   
-    service = webdriver.EdgeService(executable_path=EdgeChromiumDriverManager().install())
-    driver = webdriver.Edge(service=service, options=options)
-    set_driver(driver)
-
-def extract_company_links(page_url):
-    go_to(page_url)
-    try:
-        WebDriverWait(get_driver(), 30).until(
-            EC.presence_of_element_located((By.ID, "pcd_top_title"))
-        )
-    except TimeoutException:
-        print(f"Timeout waiting for the company directory on {page_url}")
-        return []
-    company_links = find_all(S('a.pcd_list_company_link'))
-    urls = [link.web_element.get_attribute('href') for link in company_links]
-    return urls
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import queue
+import threading
+import time
+from archive import ResponseArchive
+from async_crawl import crawl_directory
+from checkpoint import CheckpointStore
+from concurrency import AimdController
+from directory import directory_page_url
+from filters import FilterSpec
+from metrics import metrics
+from dom_extract import SELECTORS, extract_job_page, job_page_ready, wait_for_job_page
+from driver_pool import DriverPool
+from memory_governor import MemoryGovernor
+from http_fetch import BASE_URL, HttpFetcher, company_links, company_status, is_directory_page, is_transient, pagination_count
+from next_data import payload_jobs
+from page_cache import CachingFetcher, PageCache
+from pagination import PER_PAGE, fetch_pages, page_url, remaining_page_urls
+from records import ROW_COLUMNS, company_rows, decided, inactive_company, summarize_jobs
+from result_sink import ResultSink
+from selector_registry import SelectorHealthError, probe_driver, probe_tree, resolve, selectors_for
+from seen_set import SeenSet
+from tables import write_tables
+from tab_scheduler import BrowserRecycled, TabScheduler
+from task_queue import RetryableError, TaskQueue
+from urls import canonical_company_url, url_class
+
+FETCH_ENGINE = "threads"  # "threads": HTTP from worker threads, "asyncio": HTTP from one event loop, browsers only for the leftovers
+MAX_IN_FLIGHT = 256  # asyncio engine: ceiling for requests in flight at once
+MAX_HTTP_WORKERS = 64  # threads engine: ceiling for concurrent HTTP requests
+RATE_PER_HOST = 20.0  # asyncio engine: requests per second to join.com
+EXECUTION_MODE = "pool"  # "pool": one browser per worker, "tabs": one browser per letter driving TABS_PER_BROWSER tabs
+MAX_WORKERS = 16  # In pool mode one browser per worker, so this is the ceiling for concurrent page loads
+BROWSERS = 2  # Browsers launched in tabs mode
+TABS_PER_BROWSER = 8
+CHECKPOINT_DB = "crawl_state.sqlite3"  # Crawl state kept between runs; delete it to start from scratch
+TASK_QUEUE_PATH = "crawl_tasks.json"  # Unfinished tasks with their attempt counts, reloaded when a run is resumed
+MIN_REVISIT = 20 * 3600  # Companies whose jobs changed are checked again on the next daily run
+MAX_REVISIT = 32 * 24 * 3600  # Unchanged and 404 companies back off exponentially up to this
+OUTPUT_PATH = "company_status_with_keywords.csv"  # .csv, .jsonl or .parquet
+TABLES_DIR = "company_tables"  # Normalized companies/jobs Parquet datasets, partitioned by letter
+# Path of a response archive recording every page fetched, to be served
+# back by replay_server.py; None to not record
+RECORD_ARCHIVE = None
+PAGE_LOAD_STRATEGY = "eager"  # "normal", "eager" or "none"; job pages are then awaited by what they show
+PREFLIGHT = True  # Check every selector on a few live pages before crawling
+# Never download the Edge driver: only the cached one, $MSEDGEDRIVER or one
+# on the PATH is used, as on air-gapped runners
+OFFLINE_DRIVER = False
+# Browsers are restarted past this much memory (PSS of the browser and its
+# renderers together, so shared pages count once) or this many navigations,
+# between two companies or with their companies in flight handed to a fresh
+# browser; tabs are reopened after TAB_NAVIGATIONS. None disables a limit.
+MAX_BROWSER_MEMORY_MB = 1500
+MAX_BROWSER_NAVIGATIONS = 2000
+TAB_NAVIGATIONS = 200
+HTTP_CACHE_MB = 256  # HTML kept for pages fetched again in the same run, oldest dropped first
+PROBE_COMPANIES = 3  # Companies of the first directory page rendered by the probe, more until one has jobs
+# Port of the metrics endpoint, Prometheus text on /metrics and JSON on
+# /metrics.json, bound to localhost; None to only print the summary at the end
+METRICS_PORT = 9108
+# Jobs and companies to keep. Every matching location is a row in the output,
+# so pagination can only stop early with first_match_only=True.
+FILTER = FilterSpec(locations=("Suisse",))
+pool = None
+store = None
+run_id = None
+sink = None
+seen = None  # Companies queued in this run, shared by the asyncio and threaded paths
+fetcher = None
+# Concurrency actually used adapts between 1 and the ceilings above to join.com's latency and timeout/429 rate
+http_controller = None
+browser_controller = None
+rendered_pages = None  # Extracted browser pages, keyed like the HTTP page cache
+page_executor = None  # Fans the pages of one company out to the fetch workers
+archive = None
 
-def navigate_and_extract(letter):
-    base_url = 'https://join.com/companies/'
-    initial_page = f'{base_url}{letter}'
-    urls = extract_company_links(initial_page)
+def extract_company_links(driver, page_url):
+    with metrics.timer("browser_seconds", step="navigate", url_class="directory"):
+        pool.navigate(driver, page_url)
     try:
-        num_pages = len(find_all(S('a.pcd_pagination_link')))
-        for page_num in range(2, num_pages + 1):
-            page_url = f"{base_url}{letter}/page/{page_num}"
-            urls += extract_company_links(page_url)
+        with metrics.timer("browser_seconds", step="wait", url_class="directory"):
+            WebDriverWait(driver, 30).until(
+                EC.presence_of_element_located((By.ID, "pcd_top_title"))
+            )
     except TimeoutException:
-        print(f"Could not find pagination for letter {letter}, moving on.")
+        metrics.inc("browser_timeouts_total", url_class="directory")
+        raise RetryableError(f"Timeout waiting for the company directory on {page_url}")
+    if archive is not None:
+        archive.record_rendered(page_url, driver)
+    company_links = driver.find_elements(By.CSS_SELECTOR, 'a.pcd_list_company_link')
+    urls = [canonical_company_url(link.get_attribute('href')) for link in company_links]
     return urls
 
+def list_directory_page(page_url):
+    # Directory pages are server-rendered, so plain HTTP is enough unless the
+    # response does not look like a directory page.
+    page = fetcher.get(page_url)
+    if is_transient(page):
+        raise RetryableError(f"Directory page {page_url} is unavailable")
+    if is_directory_page(page):
+        return company_links(page), pagination_count(page)
+    with pool.driver() as driver:
+        urls = extract_company_links(driver, page_url)
+        num_pages = len(driver.find_elements(By.CSS_SELECTOR, 'a.pcd_pagination_link'))
+    return urls, num_pages
+
+def check_over_http(company_url):
+    # One plain fetch settles 404 companies, and companies whose embedded
+    # Next.js payload carries their whole job list. None means render it.
+    page = fetcher.get(page_url(company_url, 1, FILTER.server_params))
+    if is_transient(page):
+        raise RetryableError(f"Company page {company_url} is unavailable")
+    status = company_status(page)
+    if status is False:
+        return inactive_company(company_url)
+    if status:
+        jobs, total = payload_jobs(page.text)
+        if jobs and total is not None and len(jobs) < total and not decided(jobs, FILTER):
+            # The payload is paged: fetch every remaining page at once
+            page_urls = remaining_page_urls(company_url, total, per_page=len(jobs), params=FILTER.server_params)
+            pages = fetch_pages(page_executor, fetch_payload_page, page_urls)
+            if all(page_jobs is not None for page_jobs in pages):
+                jobs += [job for page_jobs in pages for job in page_jobs]
+        # Without a total in the payload the job count badge or the next page
+        # links of the rendered page tell whether there is more
+        if jobs is not None and ((total is not None and len(jobs) >= total) or decided(jobs, FILTER)):
+            return summarize_jobs(company_url, jobs, FILTER)
+    return None
+
+def fetch_payload_page(page_url):
+    page = fetcher.get(page_url)
+    if is_transient(page):
+        raise RetryableError(f"Job page {page_url} is unavailable")
+    if not company_status(page):
+        return None
+    jobs, _ = payload_jobs(page.text)
+    return jobs
+
+def render_job_page(page_url):
+    return rendered_pages.get_or_load(page_url, _render_job_page)
+
+def _render_job_page(page_url):
+    kind = url_class(page_url)
+    with browser_controller.slot() as slot, pool.driver() as driver:
+        with metrics.timer("browser_seconds", step="navigate", url_class=kind):
+            pool.navigate(driver, page_url)
+        try:
+            with metrics.timer("browser_seconds", step="wait", url_class=kind):
+                wait_for_job_page(driver, 10)
+        except TimeoutException:
+            slot.outcome = "timeout"
+            metrics.inc("browser_timeouts_total", url_class=kind)
+            raise RetryableError(f"Timeout occurred while trying to access {page_url}")
+        if archive is not None:
+            archive.record_rendered(page_url, driver)
+        with metrics.timer("browser_seconds", step="extract", url_class=kind):
+            return extract_job_page(driver)
+
+def render_company(company_url):
+    # Page 1 gives the job count, the remaining pages are rendered concurrently.
+    # A page that times out fails the whole company, which is retried later;
+    # pages already rendered are served from the cache on the next attempt.
+    first_page = render_job_page(page_url(company_url, 1, FILTER.server_params))
+    if "Page not found (404)" in first_page["title"]:
+        return inactive_company(company_url)
+    jobs = list(first_page["jobs"])  # The cached page must not collect the later pages' jobs
+    if first_page["total"] is None:
+        # No job count on the page, follow the next page links one by one
+        page, page_num = first_page, 1
+        while page["has_next"] and not decided(jobs, FILTER):
+            page_num += 1
+            page = render_job_page(page_url(company_url, page_num, FILTER.server_params))
+            jobs += page["jobs"]
+        return summarize_jobs(company_url, jobs, FILTER)
+    if not decided(jobs, FILTER):
+        page_urls = remaining_page_urls(company_url, first_page["total"], per_page=len(jobs) or PER_PAGE,
+                                        params=FILTER.server_params)
+        for page in fetch_pages(page_executor, render_job_page, page_urls):
+            jobs += page["jobs"]
+    return summarize_jobs(company_url, jobs, FILTER)
+
 def check_status_and_extract_keywords(company_url):
-    go_to(company_url)
-    job_keywords = {"Data": False, "Devops": False, "SRE": False, "Analytics": False}
+    company = check_over_http(company_url)
+    if company is not None:
+        return company
+    return render_company(company_url)
+
+def company_job(driver, company_url):
     is_active = False
-    locations = []  # Store each job's location
-    contract_types = []  # Store each job's contract type
+    jobs = []  # Title, location and contract type of every job tile
     page_num = 1  # Initialize the page number
     has_next_page = True
 
     while has_next_page:
-        current_page_url = f"{company_url}?page={page_num}"
-        go_to(current_page_url)
-
+        current_page_url = page_url(company_url, page_num, FILTER.server_params)
+        kind = url_class(current_page_url)
         try:
-            title = WebDriverWait(get_driver(), 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "title"))
-            ).get_attribute("textContent")
-            is_active = "Page not found (404)" not in title
-
-            if is_active:
-                job_listings = find_all(S('.JobTile___StyledJobLink-sc-989ef686-0'))
-                for listing in job_listings:
-                    # Extract location first
-                    text_elements = find_all(S('.JobTile-elements___StyledText-sc-e7e7aa1d-4'))
-                    if len(text_elements) >= 1:
-                        location_text = text_elements[0].web_element.text.strip()
-                        if "Suisse" in location_text:
-                            # Proceed only if location contains "Suisse"
-                            locations.append(location_text)
-                            contract_type = text_elements[1].web_element.text.strip() if len(text_elements) >= 2 else "Unknown"
-                            contract_types.append(contract_type)
-
-                            job_title = listing.web_element.text.lower()
-                            if "data" in job_title or "données" in job_title:
-                                job_keywords["Data"] = True
-                            if "devops" in job_title:
-                                job_keywords["Devops"] = True
-                            if "sre" in job_title or "site reliability" in job_title:
-                                job_keywords["SRE"] = True
-                            if "analytics" in job_title:
-                                job_keywords["Analytics"] = True
-
-                # Check for the next page link by its aria-label
-                next_page_elements = find_all(S('[aria-label="Next page"]'))
-                if next_page_elements:
-                    page_num += 1  # Prepare to load the next page
-                else:
-                    has_next_page = False  # No more pages to load
+            # The scheduler polls the tab until the page is ready and throws
+            # TimeoutException in here when it is not in time
+            yield current_page_url, job_page_ready
+            if archive is not None:
+                archive.record_rendered(current_page_url, driver)
+            # One script call returns the title, every tile and the next page link
+            with metrics.timer("browser_seconds", step="extract", url_class=kind):
+                page = extract_job_page(driver)
+            is_active = "Page not found (404)" not in page["title"]
+            if not is_active:
+                break
+            jobs += page["jobs"]
+            if page["has_next"] and not decided(jobs, FILTER):
+                page_num += 1  # Prepare to load the next page
+            else:
+                has_next_page = False  # No more pages to load
 
         except TimeoutException:
+            metrics.inc("browser_timeouts_total", url_class=kind)
             print(f"Timeout occurred while trying to access {current_page_url}")
-            break
-
-    #return is_active, job_keywords, locations, contract_types
-    return {"Company URL": company_url, "Status": is_active, **job_keywords, "Locations": locations, "Contract Types": contract_types}
-
-def process_company_url(url):
-    status, job_keywords, locations, contract_types = check_status_and_extract_keywords(url)
-    results = []
-    any_job_keyword_true = any(job_keywords.values())
-    if status and any_job_keyword_true:
-        for location, contract_type in zip(locations, contract_types):
-            result = {"Company URL": url, "Status": status, **job_keywords, "Location": location, "Contract Type": contract_type}
-            results.append(result)
-    return results
-
-def process_letter(letter):
-    print(f"Processing letter: {letter.upper()}")
-    company_urls = navigate_and_extract(letter)
-    all_company_info = []
-    with ThreadPoolExecutor(max_workers=16) as executor:
-        future_to_url = [executor.submit(process_company_url, url) for url in company_urls]
-        for future in as_completed(future_to_url):
-            all_company_info.extend(future.result())
-    print(f"Processed {len(company_urls)} URLs for letter {letter.upper()}.")
-    return all_company_info
+            return None  # Retried later rather than recorded with partial jobs
+
+    if not is_active:
+        return inactive_company(company_url)
+    return summarize_jobs(company_url, jobs, FILTER)
+
+
+def tab_job(driver, company_url, future, requeue=None):
+    # Hands the result of company_job back to the task waiting on it; the task
+    # is retried if the tab timed out, failed or was closed mid-job. When the
+    # browser is restarted mid-job, requeue() gives the company to another
+    # tab instead, without costing the task an attempt.
+    company = None
+    handed_back = False
+    try:
+        company = yield from company_job(driver, company_url)
+    except BrowserRecycled:
+        if requeue is not None:
+            requeue()
+            handed_back = True
+    except Exception as exc:
+        print(f"Rendering {company_url} in a tab failed: {exc!r}")
+    finally:
+        # Also reached when the scheduler closes the job, so the task never waits forever
+        if not handed_back:
+            if company is None:
+                future.set_exception(RetryableError(f"Could not render {company_url} in a tab"))
+            else:
+                future.set_result(company)
+
+def preflight(letter="a"):
+    # Fails within seconds, instead of hours later with an all-False CSV,
+    # when join.com changed its markup and no candidate of a required
+    # selector matches any more. Fallback selectors that did match are
+    # used for the rest of the run.
+    start = time.monotonic()
+    page = fetcher.get(directory_page_url(BASE_URL, letter, 1))
+    if page is None or page.status_code != 200:
+        raise SelectorHealthError(f"Probe directory page for {letter.upper()} is unavailable")
+    directory_selectors = selectors_for("directory")
+    _, failed = resolve(directory_selectors, [probe_tree(page.tree, directory_selectors)])
+    company_selectors = selectors_for("company")
+    probes = []
+    with pool.driver() as driver:
+        for url in company_links(page):
+            # At least PROBE_COMPANIES pages, and one with jobs for the per-job selectors
+            if len(probes) >= PROBE_COMPANIES and any(total for _, total in probes):
+                break
+            # The job count comes from the embedded payload when it has one,
+            # so a broken count selector cannot hide the pages with jobs
+            http_page = fetcher.get(url)
+            total = payload_jobs(http_page.text)[1] if company_status(http_page) else None
+            try:
+                pool.navigate(driver, url)
+                wait_for_job_page(driver, 10)
+            except TimeoutException:
+                continue
+            counts, shown = probe_driver(driver, company_selectors)
+            probes.append((counts, total if total is not None else shown))
+    if not probes:
+        raise SelectorHealthError("No probe company page could be loaded")
+    resolved, company_failed = resolve(company_selectors, probes)
+    failed += company_failed
+    if failed:
+        raise SelectorHealthError(f"No candidate selector matches for {', '.join(failed)}; join.com markup changed?")
+    SELECTORS.update(resolved)
+    print(f"Selector probe passed in {time.monotonic() - start:.1f}s")
+
+def company_due(url, letter=None):
+    # Whether the company has to be crawled in this run; if not, its stored
+    # record goes to the output as it is. Companies the filter excludes from
+    # the directory listing are neither crawled nor written.
+    if FILTER.skips_company(url):
+        return False
+    if store.needs_crawl(url, run_id, letter):
+        return True
+    company = store.company(url)
+    if company is not None:
+        sink.write(company_rows(company))
+    return False
+
+
+def record_company(url, company):
+    store.save_company(url, run_id, company)
+    sink.write(company_rows(company))
+
+
+def crawl(letters, directory_pages=(), company_urls=(), resume=False):
+    # Every directory page and company is a task. Transient failures raise
+    # RetryableError and the task is queued again with backoff, so a timeout
+    # no longer drops a letter page or records a company as inactive.
+    # Results go straight to the checkpoint store: directory pages already
+    # listed and companies already crawled in this run are not fetched again
+    # when an interrupted run is resumed. The queue itself is snapshotted to
+    # TASK_QUEUE_PATH, so resuming also keeps the retry state of its tasks.
+    tasks = TaskQueue(path=TASK_QUEUE_PATH)
+    if resume:
+        restored = tasks.load()
+        if restored:
+            print(f"Restored {restored} unfinished tasks from {TASK_QUEUE_PATH}")
+    else:
+        tasks.clear()  # Left over from a run that finished
+    for letter in letters:
+        tasks.put("directory", directory_page_url(BASE_URL, letter, 1), data={"letter": letter, "page": 1})
+    for directory_url in directory_pages:
+        tasks.put("directory", directory_url)
+    for url in company_urls:
+        tasks.put("company", url, priority=1)
+
+    def handle_directory(task):
+        listing = store.listed_directory_page(task.url, run_id)
+        if listing is None:
+            listing = list_directory_page(task.url)
+            store.save_directory_page(task.url, run_id, *listing)
+        urls, num_pages = listing
+        letter = task.data.get("letter")
+        for url in urls:
+            # A company listed on several pages or letters is queued once
+            if seen.add(url):
+                tasks.put("company", url, priority=1, data={"letter": letter})
+        if task.data.get("page") == 1:
+            print(f"Letter {letter.upper()}: {num_pages or 1} directory page(s)")
+            for page_num in range(2, num_pages + 1):
+                tasks.put("directory", directory_page_url(BASE_URL, letter, page_num), data={"letter": letter, "page": page_num})
+
+    render_queue = queue.Queue()
+
+    def handle_company(task):
+        if not company_due(task.url, task.data.get("letter")):
+            return
+        if EXECUTION_MODE == "tabs":
+            company = check_over_http(task.url)
+            if company is None:
+                future = Future()
+                render_queue.put((task.url, future))
+                company = future.result()
+        else:
+            company = check_status_and_extract_keywords(task.url)
+        record_company(task.url, company)
+
+    def queued_tab_jobs(driver):
+        while True:
+            try:
+                item = render_queue.get(timeout=0.05)
+            except queue.Empty:
+                yield None  # Nothing to start yet, keep polling the open tabs
+                continue
+            if item is None:
+                return
+            url, future = item
+            yield tab_job(driver, url, future, requeue=lambda item=item: render_queue.put(item))
+
+    def render_in_tabs():
+        while True:
+            try:
+                with pool.driver() as driver:
+                    scheduler = TabScheduler(driver, tabs=TABS_PER_BROWSER, on_new_tab=pool.configure_tab,
+                                             governor=pool.governor)
+                    for _ in scheduler.run(queued_tab_jobs(driver)):
+                        pass
+                if scheduler.recycled is None:
+                    return
+                # Checking the browser in restarted it, carry on with a fresh one
+            except Exception as exc:
+                print(f"Tab renderer stopped, restarting it: {exc!r}")
+
+    renderers = []
+    if EXECUTION_MODE == "tabs":
+        renderers = [threading.Thread(target=render_in_tabs, daemon=True) for _ in range(BROWSERS)]
+        for renderer in renderers:
+            renderer.start()
+    tasks.run({"directory": handle_directory, "company": handle_company}, workers=MAX_HTTP_WORKERS)
+    for renderer in renderers:
+        render_queue.put(None)
+    for renderer in renderers:
+        renderer.join()
+
+    counts = tasks.counts()
+    print(f"Processed {counts.get('done', 0)} tasks, {counts.get('failed', 0)} failed after retries.")
+    for task in tasks.failed():
+        print(f"Failed {task.kind}: {task.url} ({task.last_error})")
+    tasks.clear()
 
 
 if __name__ == '__main__':
-    start_edge_with_helium(headless=True)  # Initiate the browser in headless mode as required
+    if METRICS_PORT:
+        try:
+            metrics.serve(METRICS_PORT)
+            print(f"Metrics on http://127.0.0.1:{METRICS_PORT}/metrics")
+        except OSError as exc:
+            print(f"Metrics endpoint disabled, port {METRICS_PORT} is not available: {exc}")
+    # In tabs mode one spare browser serves directory pages that need rendering
+    browsers = BROWSERS + 1 if EXECUTION_MODE == "tabs" else MAX_WORKERS
+    # Browsers are launched lazily as workers need them; fonts, images, CSS and
+    # third-party scripts are blocked and get() returns at DOMContentLoaded
+    governor = MemoryGovernor(max_memory_mb=MAX_BROWSER_MEMORY_MB, max_navigations=MAX_BROWSER_NAVIGATIONS,
+                              tab_navigations=TAB_NAVIGATIONS)
+    pool = DriverPool(size=browsers, headless=True, page_load_strategy=PAGE_LOAD_STRATEGY, offline=OFFLINE_DRIVER,
+                      governor=governor)
+    http_controller = AimdController("HTTP", initial=8, maximum=MAX_HTTP_WORKERS)
+    browser_controller = AimdController("Browser", initial=4, maximum=browsers, target_p95=20.0)
+    archive = ResponseArchive(RECORD_ARCHIVE) if RECORD_ARCHIVE else None
+    fetcher = CachingFetcher(HttpFetcher(pool_size=MAX_HTTP_WORKERS, controller=http_controller, archive=archive),
+                             PageCache(max_bytes=HTTP_CACHE_MB * 1024 * 1024))
+    rendered_pages = PageCache()
+    page_executor = ThreadPoolExecutor(max_workers=MAX_HTTP_WORKERS)
+    if PREFLIGHT:
+        try:
+            preflight()
+        except SelectorHealthError as exc:
+            print(f"Aborting before the crawl: {exc}")
+            pool.close()
+            fetcher.close()
+            page_executor.shutdown()
+            raise SystemExit(1)
 
     letters = [chr(i) for i in range(97, 123)]  # Generating letters a-z
     letters.append('#')  # Include any additional characters if needed
 
-    all_company_info = []
-
-    with ThreadPoolExecutor(max_workers=16) as executor:
-        # Process each letter in parallel
-        futures_to_letters = [executor.submit(process_letter, letter) for letter in letters]
+    store = CheckpointStore(CHECKPOINT_DB, min_revisit=MIN_REVISIT, max_revisit=MAX_REVISIT)
+    run_id, resumed = store.start_run()
+    if resumed:
+        print(f"Resuming unfinished run {run_id} from {CHECKPOINT_DB}")
+    # Rows are written as companies are settled, so partial results can be
+    # read while the crawl runs
+    sink = ResultSink(OUTPUT_PATH, ROW_COLUMNS)
+    seen = SeenSet()
+    metrics.gauge("rows_written", lambda: sink.rows_written)
+    metrics.gauge("companies_seen", lambda: len(seen))
+    metrics.gauge("page_cache_hits", lambda: fetcher.cache.hits, cache="http")
+    metrics.gauge("page_cache_hits", lambda: rendered_pages.hits, cache="rendered")
 
-        for future in as_completed(futures_to_letters):
-            all_company_info.extend(future.result())
-
-    # Convert the results into a pandas DataFrame
-    df = pd.DataFrame(all_company_info)
+    if FETCH_ENGINE == "asyncio":
+        _, to_render, letters_to_render, pages_to_render = asyncio.run(
+            crawl_directory(letters, BASE_URL,
+                            is_due=company_due, on_company=record_company, seen=seen,
+                            max_in_flight=MAX_IN_FLIGHT, rate_per_host=RATE_PER_HOST, spec=FILTER, archive=archive,
+                            controller=AimdController("Async HTTP", initial=32, maximum=MAX_IN_FLIGHT))
+        )
+        # Whatever plain HTTP could not settle goes through the task queue and browsers
+        crawl(letters_to_render, pages_to_render, to_render, resume=resumed)
+    else:
+        # Directory pages and companies are worked off one queue, so company
+        # crawling starts with the first directory page that comes back
+        crawl(letters, resume=resumed)
 
-    # Export the DataFrame to a CSV file
-    df.to_csv("company_status_with_keywords.csv", index=False)
+    crawled, skipped = store.revisit_counts(run_id)
+    print(f"Crawled {crawled} companies, {skipped} not due for a revisit yet")
+    sink.close()
+    num_companies, num_jobs = write_tables(store.companies(run_id), TABLES_DIR)
+    print(f"{num_companies} companies and {num_jobs} jobs written to {TABLES_DIR}")
+    store.finish_run(run_id)
+    store.close()
 
-    kill_browser()  # Close the browser session
+    page_executor.shutdown()
+    pool.close()  # Close every browser session
+    fetcher.close()
+    if archive is not None:
+        print(f"{len(archive)} pages recorded in {RECORD_ARCHIVE}")
+        archive.close()
+    print(f"Page cache: {fetcher.cache.hits} HTTP and {rendered_pages.hits} rendered hits")
 
-    print("DataFrame exported to company_status_with_keywords.csv")
+    print(f"{sink.rows_written} rows exported to {OUTPUT_PATH}")
+    print(metrics.summary())
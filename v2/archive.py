@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+
+from http_fetch import NOT_FOUND_TITLE
+from urls import canonical_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    path TEXT PRIMARY KEY,
+    origin TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    recorded REAL NOT NULL
+);
+"""
+
+
+def archive_key(url):
+    # Path and query of the canonical URL, so a page recorded from join.com
+    # is found again whatever host the replay server runs on
+    parts = urlsplit(canonical_url(url))
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+
+def origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class ResponseArchive:
+    # Every page the crawler fetched, zlib-compressed in one SQLite file:
+    # directory pages, company pages and their ?page=N pages, over HTTP or
+    # as rendered by the browser. A later recording of the same page
+    # replaces the earlier one. replay_server.py serves it back.
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def record(self, url, status, text):
+        if status == 429 or status >= 500:
+            return  # Transient answers are not worth replaying
+        body = zlib.compress((text or "").encode("utf-8"), 6)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (path, origin, status, body, recorded) VALUES (?, ?, ?, ?, ?)",
+                (archive_key(url), origin(url), status, body, time.time()),
+            )
+
+    def record_rendered(self, url, driver):
+        # The browser reports no status code; the 404 page is told by its title
+        self.record(url, 404 if NOT_FOUND_TITLE in driver.title else 200, driver.page_source)
+
+    def lookup(self, path):
+        # (status, text, recorded origin) for a request path, or None
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status, body, origin FROM responses WHERE path = ?", (archive_key(path),)
+            ).fetchone()
+        if row is None:
+            return None
+        status, body, recorded_origin = row
+        return status, zlib.decompress(body).decode("utf-8"), recorded_origin
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,225 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from directory import directory_page_url
+from filters import DEFAULT_FILTER
+from metrics import metrics
+from http_fetch import USER_AGENT, Page, company_links, company_status, is_directory_page, pagination_count
+from next_data import payload_jobs
+from pagination import page_url, remaining_page_urls
+from records import decided, inactive_company, summarize_jobs
+from urls import url_class
+
+
+def _pages_jobs(pages):
+    # Jobs of each extra page, None for a page that did not come back
+    return [payload_jobs(page.text)[0] if company_status(page) else None for page in pages]
+
+
+def _directory_listing(page):
+    # (company links, number of pages) of a directory page, or None
+    if not is_directory_page(page):
+        return None
+    return company_links(page), pagination_count(page)
+
+
+class TokenBucket:
+    # Politeness limit for one host: `rate` requests per second on average,
+    # with bursts of up to `burst` requests.
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncCrawler:
+    # HTTP crawl from a single event loop. A global semaphore bounds requests
+    # in flight, a token bucket per host bounds the request rate and one
+    # aiohttp session keeps connections alive across all of them. With an
+    # AimdController the in-flight bound follows its adaptive limit instead.
+    # HTML parsing and the callbacks, which write to sqlite, run in worker
+    # threads so the event loop keeps serving sockets meanwhile.
+
+    def __init__(self, max_in_flight=256, rate_per_host=20.0, burst=40, timeout=15, controller=None,
+                 spec=DEFAULT_FILTER, archive=None):
+        self.max_in_flight = max_in_flight
+        self.archive = archive
+        self.controller = controller
+        self.spec = spec
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.timeout = timeout
+        self.session = None
+        self._semaphore = None
+        self._gate = None
+        self._buckets = {}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, ttl_dns_cache=300, keepalive_timeout=30)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"User-Agent": USER_AGENT, "Accept-Language": "en"},
+        )
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._gate = asyncio.Condition()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+
+    def _bucket(self, host):
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+        return self._buckets[host]
+
+    async def fetch(self, url):
+        async with self._semaphore:
+            if self.controller is None:
+                page, _, _ = await self._fetch(url)
+                return page
+            async with self._gate:
+                await self._gate.wait_for(lambda: self.controller.in_flight < self.controller.limit)
+                self.controller.started()
+            latency, outcome = 0.0, "error"
+            try:
+                page, outcome, latency = await self._fetch(url)
+                return page
+            finally:
+                async with self._gate:
+                    self.controller.release(latency, outcome)
+                    self._gate.notify_all()
+
+    async def _fetch(self, url):
+        # (page or None, outcome, seconds spent on the request itself). The
+        # wait for a rate-limit token is left out of the latency, so the
+        # controller reacts to the server and not to the token bucket.
+        await self._bucket(urlsplit(url).netloc).acquire()
+        kind = url_class(url)
+        start = time.monotonic()
+        try:
+            async with self.session.get(url) as response:
+                page = Page(str(response.url), response.status, await response.text())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            print(f"HTTP fetch failed for {url}: {exc!r}")
+            outcome = "timeout" if isinstance(exc, asyncio.TimeoutError) else "error"
+            metrics.inc("http_errors_total", engine="asyncio", url_class=kind, error=outcome)
+            return None, outcome, time.monotonic() - start
+        finally:
+            metrics.observe("http_request_seconds", time.monotonic() - start, engine="asyncio", url_class=kind)
+        latency = time.monotonic() - start
+        metrics.inc("http_responses_total", engine="asyncio", url_class=kind, status=page.status_code)
+        if self.archive is not None:
+            self.archive.record(url, page.status_code, page.text)
+        return page, "throttled" if page.status_code == 429 else "ok", latency
+
+    async def company(self, company_url):
+        # Async twin of check_over_http: the company record, or None when the
+        # page has to be rendered in a browser.
+        params = self.spec.server_params
+        page = await self.fetch(page_url(company_url, 1, params))
+        status = await asyncio.to_thread(company_status, page)
+        if status is False:
+            return inactive_company(company_url)
+        if not status:
+            return None
+        jobs, total = await asyncio.to_thread(payload_jobs, page.text)
+        if jobs and total is not None and len(jobs) < total and not decided(jobs, self.spec):
+            urls = remaining_page_urls(company_url, total, per_page=len(jobs), params=params)
+            pages = await asyncio.gather(*(self.fetch(url) for url in urls))
+            more = await asyncio.to_thread(_pages_jobs, pages)
+            if all(page_jobs is not None for page_jobs in more):
+                jobs += [job for page_jobs in more for job in page_jobs]
+        if jobs is not None and ((total is not None and len(jobs) >= total) or decided(jobs, self.spec)):
+            return await asyncio.to_thread(summarize_jobs, company_url, jobs, self.spec)
+        return None
+
+    async def crawl(self, letters, base_url, is_due=None, on_company=None, seen=None):
+        # Enumerates the directory and crawls companies as they are discovered.
+        # Returns the settled company records plus what plain HTTP could not
+        # settle: company URLs, letters and directory page URLs to render.
+        # is_due(url, letter) can skip companies that are fresh enough, and
+        # on_company(url, company) sees every record as soon as it is settled.
+        # With a SeenSet, a company listed on several pages or letters is
+        # crawled once. A task that fails hands its company or directory page
+        # to the browsers instead of ending the crawl. With on_company the
+        # records are not kept and the first value returned is their number,
+        # so memory does not grow with the companies crawled.
+        companies, to_render, letters_to_render, pages_to_render = [], [], [], []
+        settled = 0
+        tasks = {}  # Task -> (kind, list its item goes to on failure, item)
+
+        def spawn(coroutine, kind, fallback, item):
+            tasks[asyncio.ensure_future(coroutine)] = (kind, fallback, item)
+
+        def new_companies(links, letter):
+            due = []
+            for company_url in links:
+                if seen is not None and not seen.add(company_url):
+                    continue
+                if is_due is None or is_due(company_url, letter):
+                    due.append(company_url)
+            return due
+
+        async def handle_company(company_url):
+            nonlocal settled
+            company = await self.company(company_url)
+            if company is None:
+                to_render.append(company_url)
+            elif on_company is not None:
+                await asyncio.to_thread(on_company, company_url, company)
+                settled += 1
+            else:
+                companies.append(company)
+
+        async def handle_directory(letter, page_num):
+            page_url = directory_page_url(base_url, letter, page_num)
+            page = await self.fetch(page_url)
+            listing = await asyncio.to_thread(_directory_listing, page)
+            if listing is None:
+                if page_num == 1:
+                    letters_to_render.append(letter)
+                else:
+                    pages_to_render.append(page_url)
+                return
+            links, num_pages = listing
+            for company_url in await asyncio.to_thread(new_companies, links, letter):
+                spawn(handle_company(company_url), "company", to_render, company_url)
+            if page_num == 1:
+                for next_page in range(2, num_pages + 1):
+                    spawn(handle_directory(letter, next_page), "directory", pages_to_render,
+                          directory_page_url(base_url, letter, next_page))
+
+        for letter in letters:
+            spawn(handle_directory(letter, 1), "directory", letters_to_render, letter)
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                kind, fallback, item = tasks.pop(task)
+                if task.exception() is not None:
+                    print(f"Async crawl of {item} failed, leaving it to the browsers: {task.exception()!r}")
+                    metrics.inc("async_task_failures_total", kind=kind)
+                    fallback.append(item)
+        return settled if on_company is not None else companies, to_render, letters_to_render, pages_to_render
+
+
+async def crawl_directory(letters, base_url, is_due=None, on_company=None, seen=None, **options):
+    async with AsyncCrawler(**options) as crawler:
+        return await crawler.crawl(letters, base_url, is_due, on_company, seen)
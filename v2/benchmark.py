@@ -0,0 +1,396 @@
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from archive import ResponseArchive
+from directory import directory_page_url
+from dom_extract import extract_job_page, job_page_ready, wait_for_job_page
+from http_fetch import HttpFetcher, company_links, company_status, is_directory_page, pagination_count
+from keywords import KeywordClassifier
+from memory_governor import browser_pid, process_tree_memory
+from next_data import payload_jobs
+from pagination import PER_PAGE, remaining_page_urls
+from records import ROW_COLUMNS, company_rows, inactive_company, summarize_jobs
+from result_sink import ResultSink
+
+# Per-stage throughput of the crawl pipeline against a synthetic fixture
+# site served by replay_server.py, so versions can be compared without
+# touching join.com. Every stage runs at each concurrency level for each
+# fixture size; results are written as JSON and can be compared with an
+# earlier file:
+#
+#   python benchmark.py --companies 200,1000 --concurrency 1,8,32 --label my-branch --output results.json
+#   python benchmark.py --compare baseline.json --output results.json
+#   python benchmark.py --browser-pages 100 --browser-concurrency 1,4,8
+#
+# Concurrency 1 is the serial baseline the v1 scripts correspond to. With
+# --browser-pages, company pages are also rendered in Edge, once with one
+# browser per worker thread and once with one tab per worker in a single
+# browser; at concurrency 1 both are the serial v1 way.
+#
+# Memory is reported per stage as the resident memory of this process after
+# the stage and what the stage added to it, and for browser stages as the
+# PSS of the browsers' process trees.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_ORIGIN = "https://join.com"
+LETTERS = [chr(i) for i in range(97, 123)]
+COMPANIES_PER_DIRECTORY_PAGE = 20
+JOB_TITLES = ["Data Engineer", "Senior DevOps Engineer", "Site Reliability Engineer", "Account Executive",
+              "Analytics Lead", "Pressure Test Technician", "Backend Developer", "Datenanalyst (m/w/d)"]
+LOCATIONS = ["Zürich, Suisse", "Genève, Suisse", "Berlin, Deutschland", "Paris, France"]
+
+
+def company_page(name, page_num, total_jobs):
+    # Same shape as a join.com company page: the job list in __NEXT_DATA__
+    # and as job tiles holding their location and contract type, with the
+    # job count badge
+    start = (page_num - 1) * PER_PAGE
+    items = [{"title": JOB_TITLES[(start + i) % len(JOB_TITLES)], "idParam": f"{name}-{start + i}",
+              "location": LOCATIONS[(start + i) % len(LOCATIONS)], "employmentType": {"name": "Employee"}}
+             for i in range(min(PER_PAGE, total_jobs - start))]
+    data = {"props": {"pageProps": {"jobs": {"items": items, "pagination": {"total": total_jobs}}}}}
+    tiles = "".join(
+        f'<a class="JobTile___StyledJobLink-sc-989ef686-0" href="/companies/{name}/jobs/{item["idParam"]}">'
+        f'<h3>{item["title"]}</h3><span class="JobTile-elements___StyledText-sc-e7e7aa1d-4">{item["location"]}'
+        f'</span><span class="JobTile-elements___StyledText-sc-e7e7aa1d-4">Employee</span></a>'
+        for item in items
+    )
+    return (f'<html><head><title>{name} jobs</title></head><body><div data-testid="TabBadge">{total_jobs}</div>'
+            f'{tiles}<script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script></body></html>')
+
+
+def fixture_names(companies):
+    # Company names of a fixture by letter; every tenth company is a 404 and
+    # job counts cycle from 0 to 12
+    names = {letter: [] for letter in LETTERS}
+    for number in range(companies):
+        names[LETTERS[number % len(LETTERS)]].append(f"{LETTERS[number % len(LETTERS)]}company{number}")
+    return names
+
+
+def fixture_job_pages(base_url, companies, limit):
+    # Up to `limit` company pages of the fixture that list jobs
+    numbers = [number for number in range(companies) if number % 10 and number % 13]
+    return [f"{base_url}{LETTERS[number % len(LETTERS)]}company{number}" for number in numbers[:limit]]
+
+
+def build_fixture(path, companies):
+    archive = ResponseArchive(path)
+    names = fixture_names(companies)
+    for letter, letter_names in names.items():
+        pages = [letter_names[start:start + COMPANIES_PER_DIRECTORY_PAGE]
+                 for start in range(0, len(letter_names), COMPANIES_PER_DIRECTORY_PAGE)] or [[]]
+        pagination = "".join(f'<a class="pcd_pagination_link" href="#">{number}</a>' for number in range(1, len(pages) + 1))
+        for page_num, page_names in enumerate(pages, 1):
+            links = "".join(f'<a class="pcd_list_company_link" href="{FIXTURE_ORIGIN}/companies/{name}">{name}</a>'
+                            for name in page_names)
+            html = (f'<html><head><title>Companies {letter}</title></head><body><h1 id="pcd_top_title">{letter}</h1>'
+                    f'{links}{pagination}</body></html>')
+            archive.record(directory_page_url(f"{FIXTURE_ORIGIN}/companies/", letter, page_num), 200, html)
+        for name in letter_names:
+            number = int(name.rsplit("company", 1)[1])
+            url = f"{FIXTURE_ORIGIN}/companies/{name}"
+            if number % 10 == 0:
+                archive.record(url, 404, "<html><head><title>Page not found (404)</title></head></html>")
+                continue
+            total_jobs = number % 13
+            archive.record(url, 200, company_page(name, 1, total_jobs))
+            for page_url in remaining_page_urls(url, total_jobs):
+                archive.record(page_url, 200, company_page(name, int(page_url.rsplit("=", 1)[1]), total_jobs))
+    archive.close()
+
+
+def check_rendered(page):
+    # The fixture location of every job, read from the job id in its link,
+    # so a benchmark never times an extraction that reads the wrong tile
+    for job in page["jobs"]:
+        expected = LOCATIONS[int(job["href"].rsplit("-", 1)[1]) % len(LOCATIONS)]
+        if job["location"] != expected:
+            raise RuntimeError(f"Extracted location {job['location']!r} for {job['href']}, the fixture has {expected!r}")
+    return page
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(archive_path, latency, jitter):
+    # In its own process, so its CPU time and memory stay out of the numbers
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "replay_server.py"), archive_path, "--port", str(port),
+         "--latency", str(latency), "--jitter", str(jitter)],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server, f"http://127.0.0.1:{port}/companies/"
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("Replay server did not start")
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def rss_mb():
+    # Resident memory of this process now, or None where it cannot be read
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def browsers_mb(drivers):
+    memory = [process_tree_memory(browser_pid(driver)) for driver in drivers if browser_pid(driver) is not None]
+    memory = [value for value in memory if value is not None]
+    return sum(memory) / (1024 * 1024) if memory else None
+
+
+class Stage:
+    # Times every call of one pipeline stage; a stage can run several
+    # batches, e.g. directory page 1 of every letter, then the later pages.
+
+    def __init__(self, name, concurrency):
+        self.name = name
+        self.concurrency = concurrency
+        self.latencies = []
+        self.seconds = 0.0
+        self.rss_before = rss_mb()
+        self.browser_memory = None
+
+    def sample_browsers(self, drivers):
+        # Keeps the largest browser memory seen during the stage
+        memory = browsers_mb(drivers)
+        if memory is not None:
+            self.browser_memory = max(memory, self.browser_memory or 0)
+
+    def run(self, items, work):
+        # Runs work(item) for every item on `concurrency` threads; results
+        # come back in item order
+        def timed(item):
+            start = time.perf_counter()
+            result = work(item)
+            self.latencies.append(time.perf_counter() - start)
+            return result
+
+        start = time.perf_counter()
+        if self.concurrency > 1:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                results = list(executor.map(timed, items))
+        else:
+            results = [timed(item) for item in items]
+        self.seconds += time.perf_counter() - start
+        return results
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        rss = rss_mb()
+        stats = {
+            "stage": self.name,
+            "concurrency": self.concurrency,
+            "items": len(latencies),
+            "seconds": round(self.seconds, 4),
+            "per_second": round(len(latencies) / self.seconds, 2) if self.seconds else None,
+            "latency_ms": {label: round(percentile(latencies, fraction) * 1000, 3) if latencies else None
+                           for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))},
+            "rss_mb": round(rss, 1) if rss is not None else None,
+            "rss_growth_mb": round(rss - self.rss_before, 1) if None not in (rss, self.rss_before) else None,
+        }
+        if self.browser_memory is not None:
+            stats["browser_memory_mb"] = round(self.browser_memory, 1)
+        print(f"  {self.name:<15} x{self.concurrency:<3} {stats['items']:>6} items  "
+              f"{stats['per_second'] or 0:>9.1f}/s  p95 {stats['latency_ms']['p95'] or 0:.1f} ms")
+        return stats
+
+
+def bench_pipeline(base_url, concurrency, output_dir):
+    # One pass over the fixture, stage by stage: each stage works on what
+    # the previous one produced. Keyword classification and output writing
+    # are CPU-bound and run on one thread.
+    fetcher = HttpFetcher(pool_size=max(concurrency, 4))
+    classifier = KeywordClassifier()
+    results = []
+    try:
+        stage = Stage("directory", concurrency)
+        pages = stage.run([directory_page_url(base_url, letter, 1) for letter in LETTERS], fetcher.get)
+        pages += stage.run([directory_page_url(base_url, letter, page_num)
+                            for letter, page in zip(LETTERS, list(pages)) if is_directory_page(page)
+                            for page_num in range(2, pagination_count(page) + 1)], fetcher.get)
+        results.append(stage.stats())
+        company_urls = [url for page in pages if is_directory_page(page) for url in company_links(page)]
+
+        def status(url):
+            page = fetcher.get(url)
+            active = company_status(page)
+            jobs, total = payload_jobs(page.text) if active else (None, None)
+            return url, active, jobs, total
+
+        stage = Stage("company", concurrency)
+        statuses = stage.run(company_urls, status)
+        results.append(stage.stats())
+
+        def page_jobs(url):
+            page = fetcher.get(url)
+            return (payload_jobs(page.text)[0] if company_status(page) else None) or []
+
+        stage = Stage("pagination", concurrency)
+        more_jobs = {}
+        for url, active, jobs, total in statuses:
+            if active and jobs and total is not None and len(jobs) < total:
+                more_jobs[url] = remaining_page_urls(url, total, per_page=len(jobs))
+        fetched = iter(stage.run([page for pages in more_jobs.values() for page in pages], page_jobs))
+        more_jobs = {url: [job for _ in pages for job in next(fetched)] for url, pages in more_jobs.items()}
+        results.append(stage.stats())
+
+        companies = [summarize_jobs(url, (jobs or []) + more_jobs.get(url, [])) if active else inactive_company(url)
+                     for url, active, jobs, total in statuses]
+        stage = Stage("keywords", 1)
+        stage.run([job["title"] for company in companies for job in company["Jobs"]], classifier.matches)
+        results.append(stage.stats())
+
+        sink = ResultSink(os.path.join(output_dir, f"rows-{concurrency}.csv"), ROW_COLUMNS)
+        stage = Stage("output", 1)
+        stage.run(companies, lambda company: sink.write(company_rows(company)))
+        sink.close()
+        results.append(stage.stats())
+    finally:
+        fetcher.close()
+    return results
+
+
+def bench_browsers(urls, concurrency):
+    # Renders the same company pages in Edge with one browser per worker
+    # thread, the way scrapping 3.py and 4.py do, then with one tab per
+    # worker in a single browser. Browsers are launched before the clock
+    # starts.
+    from driver_pool import DriverPool  # Selenium is only needed for these stages
+    from tab_scheduler import TabScheduler
+
+    results = []
+    pool = DriverPool(size=concurrency)
+    try:
+        drivers = [pool.checkout() for _ in range(concurrency)]
+        for driver in drivers:
+            pool.checkin(driver)
+
+        def render(url):
+            with pool.driver() as driver:
+                pool.navigate(driver, url)
+                wait_for_job_page(driver)
+                return check_rendered(extract_job_page(driver))
+
+        stage = Stage("browser-threads", concurrency)
+        stage.run(urls, render)
+        stage.sample_browsers(drivers)
+        results.append(stage.stats())
+    finally:
+        pool.close()
+
+    pool = DriverPool(size=1)
+    try:
+        with pool.driver() as driver:
+            stage = Stage("browser-tabs", concurrency)
+            scheduler = TabScheduler(driver, tabs=concurrency, on_new_tab=pool.configure_tab)
+
+            def job(url):
+                start = time.perf_counter()
+                yield url, job_page_ready
+                result = check_rendered(extract_job_page(driver))
+                stage.latencies.append(time.perf_counter() - start)
+                return result
+
+            start = time.perf_counter()
+            for done, _ in enumerate(scheduler.run(job(url) for url in urls), 1):
+                if done % concurrency == 0:
+                    stage.sample_browsers([driver])  # While the other tabs still hold their pages
+            stage.seconds += time.perf_counter() - start
+            results.append(stage.stats())
+    finally:
+        pool.close()
+    return results
+
+
+def compare(results, baseline):
+    # Throughput change per stage against an earlier results file
+    earlier = {(run["stage"], run["companies"], run["concurrency"]): run for run in baseline["results"]}
+    print(f"Compared with {baseline.get('label') or 'baseline'}:")
+    for run in results:
+        before = earlier.get((run["stage"], run["companies"], run["concurrency"]))
+        if before and before["per_second"] and run["per_second"]:
+            change = run["per_second"] / before["per_second"] - 1
+            print(f"  {run['stage']:<15} {run['companies']:>6} companies x{run['concurrency']:<3} "
+                  f"{before['per_second']:>9.1f}/s -> {run['per_second']:>9.1f}/s ({change:+.0%})")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the crawl stages against a local fixture site")
+    parser.add_argument("--companies", default="200,1000", help="Fixture sizes, comma separated")
+    parser.add_argument("--concurrency", default="1,8,32", help="Worker counts, comma separated")
+    parser.add_argument("--latency", type=float, default=0.02, help="Fixture server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--browser-pages", type=int, default=0,
+                        help="Company pages to render in Edge per run, 0 to skip the browser stages")
+    parser.add_argument("--browser-concurrency", default="1,4,8", help="Browsers or tabs, comma separated")
+    parser.add_argument("--label", default="", help="Name of the version being measured")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    options = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for companies in [int(value) for value in options.companies.split(",")]:
+            archive_path = os.path.join(workdir, f"fixture-{companies}.sqlite3")
+            build_fixture(archive_path, companies)
+            server, base_url = start_server(archive_path, options.latency, options.jitter)
+            try:
+                for concurrency in [int(value) for value in options.concurrency.split(",")]:
+                    print(f"{companies} companies, concurrency {concurrency}")
+                    for stats in bench_pipeline(base_url, concurrency, workdir):
+                        runs.append(dict(stats, companies=companies))
+                if options.browser_pages:
+                    urls = fixture_job_pages(base_url, companies, options.browser_pages)
+                    for concurrency in [int(value) for value in options.browser_concurrency.split(",")]:
+                        print(f"{len(urls)} rendered company pages, concurrency {concurrency}")
+                        for stats in bench_browsers(urls, concurrency):
+                            runs.append(dict(stats, companies=companies))
+            finally:
+                server.terminate()
+                server.wait()
+
+    report = {
+        "label": options.label,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fixture": {"latency": options.latency, "jitter": options.jitter},
+        "results": runs,
+    }
+    with open(options.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Results written to {options.output}")
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as handle:
+            compare(runs, json.load(handle))
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    finished REAL
+);
+CREATE TABLE IF NOT EXISTS directory_pages (
+    url TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    listing TEXT NOT NULL,
+    PRIMARY KEY (url, run_id)
+);
+CREATE TABLE IF NOT EXISTS companies (
+    url TEXT PRIMARY KEY,
+    letter TEXT,
+    status INTEGER,
+    content_hash TEXT,
+    record TEXT,
+    last_crawled REAL,
+    crawled_run INTEGER,
+    last_seen_run INTEGER,
+    job_count INTEGER,
+    revisit_interval REAL,
+    next_due REAL
+);
+CREATE INDEX IF NOT EXISTS companies_seen ON companies (last_seen_run);
+"""
+
+# Columns added after the first version of the schema, for older state files
+MIGRATIONS = {
+    "job_count": "ALTER TABLE companies ADD COLUMN job_count INTEGER",
+    "revisit_interval": "ALTER TABLE companies ADD COLUMN revisit_interval REAL",
+    "next_due": "ALTER TABLE companies ADD COLUMN next_due REAL",
+}
+
+
+def content_hash(company):
+    jobs = company.get("Jobs") or []
+    payload = json.dumps([company["Status"], jobs], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def revisit_interval(previous, changed, min_interval, max_interval):
+    # A company whose fingerprint changed is checked again after min_interval;
+    # every unchanged visit doubles the wait, up to max_interval. Inactive
+    # (404) companies are unchanged visit after visit, so they back off too.
+    if changed or previous is None:
+        return min_interval
+    return min(max_interval, max(min_interval, previous * 2))
+
+
+class CheckpointStore:
+    # Crawl state in a local SQLite file: which runs finished, the company
+    # URLs each directory page listed during a run, and per company its last
+    # crawl time, status, content hash and extracted record. Everything is
+    # written as soon as it is known, so a crash loses at most the work in
+    # flight and the next run resumes the unfinished one.
+    # The job count and content hash are the company's fingerprint: each
+    # crawl compares them with the previous one to schedule the next visit,
+    # see revisit_interval.
+
+    def __init__(self, path="crawl_state.sqlite3", min_revisit=20 * 3600, max_revisit=32 * 24 * 3600):
+        self.path = path
+        self.min_revisit = min_revisit
+        self.max_revisit = max_revisit
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(companies)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self._connection.execute(statement)
+
+    def _execute(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def start_run(self):
+        # Returns (run id, resumed): the last run again if it never finished
+        rows = self._execute("SELECT id, finished FROM runs ORDER BY id DESC LIMIT 1")
+        if rows and rows[0][1] is None:
+            return rows[0][0], True
+        with self._lock:
+            cursor = self._connection.execute("INSERT INTO runs (started) VALUES (?)", (time.time(),))
+            return cursor.lastrowid, False
+
+    def finish_run(self, run_id):
+        self._execute("UPDATE runs SET finished = ? WHERE id = ?", (time.time(), run_id))
+
+    def listed_directory_page(self, url, run_id):
+        # (company urls, number of directory pages) if listed earlier in the run
+        rows = self._execute("SELECT listing FROM directory_pages WHERE url = ? AND run_id = ?", (url, run_id))
+        if not rows:
+            return None
+        listing = json.loads(rows[0][0])
+        return listing["urls"], listing["pages"]
+
+    def save_directory_page(self, url, run_id, company_urls, num_pages):
+        value = json.dumps({"urls": company_urls, "pages": num_pages})
+        self._execute("INSERT OR REPLACE INTO directory_pages (url, run_id, listing) VALUES (?, ?, ?)",
+                      (url, run_id, value))
+
+    def needs_crawl(self, url, run_id, letter=None):
+        # Marks the company as listed in this run and tells whether it has to
+        # be fetched: never crawled, or crawled in an earlier run and due for
+        # a revisit.
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO companies (url, letter, last_seen_run) VALUES (?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET last_seen_run = excluded.last_seen_run, "
+                "letter = COALESCE(excluded.letter, companies.letter)",
+                (url, letter, run_id),
+            )
+            last_crawled, crawled_run, next_due = self._connection.execute(
+                "SELECT last_crawled, crawled_run, next_due FROM companies WHERE url = ?", (url,)
+            ).fetchone()
+        if last_crawled is None:
+            return True
+        if crawled_run == run_id:
+            return False
+        if next_due is None:
+            next_due = last_crawled + self.min_revisit
+        return time.time() >= next_due
+
+    def save_company(self, url, run_id, company):
+        # Stores the record and schedules the next visit from how the
+        # fingerprint compares with the previous crawl. Returns whether it
+        # changed.
+        jobs = company.get("Jobs") or []
+        new_hash = content_hash(company)
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute(
+                "SELECT job_count, content_hash, revisit_interval FROM companies WHERE url = ?", (url,)
+            ).fetchone()
+            old_count, old_hash, old_interval = previous or (None, None, None)
+            changed = old_hash is None or old_hash != new_hash or old_count != len(jobs)
+            interval = revisit_interval(old_interval, changed, self.min_revisit, self.max_revisit)
+            self._connection.execute(
+                "UPDATE companies SET status = ?, content_hash = ?, record = ?, last_crawled = ?, crawled_run = ?, "
+                "job_count = ?, revisit_interval = ?, next_due = ? WHERE url = ?",
+                (int(bool(company["Status"])), new_hash, json.dumps(company, ensure_ascii=False), now, run_id,
+                 len(jobs), interval, now + interval, url),
+            )
+        return changed
+
+    def revisit_counts(self, run_id):
+        # (companies crawled in this run, companies listed but not due yet)
+        crawled, skipped = self._execute(
+            "SELECT COUNT(CASE WHEN crawled_run = ? THEN 1 END), COUNT(CASE WHEN crawled_run != ? THEN 1 END) "
+            "FROM companies WHERE last_seen_run = ?",
+            (run_id, run_id, run_id),
+        )[0]
+        return crawled, skipped
+
+    def company(self, url):
+        # Stored record of one company, or None if it was never crawled
+        rows = self._execute("SELECT record FROM companies WHERE url = ? AND record IS NOT NULL", (url,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def companies(self, run_id, batch_size=1000):
+        # Latest record of every company listed in the directory during the
+        # run, as batches of (company id, letter, record)
+        last_id = 0
+        while True:
+            rows = self._execute(
+                "SELECT rowid, letter, record FROM companies WHERE last_seen_run = ? AND record IS NOT NULL "
+                "AND rowid > ? ORDER BY rowid LIMIT ?",
+                (run_id, last_id, batch_size),
+            )
+            if not rows:
+                return
+            yield [(company_id, letter, json.loads(record)) for company_id, letter, record in rows]
+            last_id = rows[-1][0]
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from metrics import metrics
+
+FAILURES = ("timeout", "throttled")
+
+
+class Slot:
+    def __init__(self):
+        self.outcome = "ok"  # "ok", "timeout", "throttled" (HTTP 429) or "error"
+
+
+class AimdController:
+    # Additive-increase / multiplicative-decrease concurrency limit. Every
+    # `interval` seconds it looks at the p95 latency and the timeout/429 rate
+    # of the requests completed since the last look: if either is over target
+    # the limit is multiplied by `decrease`, otherwise it grows by `increase`
+    # as long as the current limit was actually used.
+
+    def __init__(self, name, initial, maximum, minimum=1, target_p95=10.0, max_failure_rate=0.05,
+                 increase=1.0, decrease=0.5, interval=2.0):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_p95 = target_p95
+        self.max_failure_rate = max_failure_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.interval = interval
+        self._limit = float(min(max(initial, minimum), maximum))
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._samples = deque(maxlen=1000)
+        self._last_adjust = time.monotonic()
+        self._condition = threading.Condition()
+        self.p95 = None
+        self.failure_rate = 0.0
+        metrics.gauge("in_flight", lambda: self._in_flight, controller=name)
+        metrics.gauge("concurrency_limit", lambda: self.limit, controller=name)
+
+    @property
+    def limit(self):
+        return max(self.minimum, int(self._limit))
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self.started()
+
+    def release(self, latency, outcome="ok"):
+        with self._condition:
+            self._in_flight -= 1
+            self.record(latency, outcome)
+            self._condition.notify_all()
+
+    def started(self):
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def record(self, latency, outcome="ok"):
+        metrics.inc("requests_total", controller=self.name, outcome=outcome)
+        self._samples.append((latency, outcome))
+        self._adjust()
+
+    def _adjust(self):
+        now = time.monotonic()
+        if now - self._last_adjust < self.interval or not self._samples:
+            return
+        latencies = sorted(latency for latency, _ in self._samples)
+        self.p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        self.failure_rate = sum(outcome in FAILURES for _, outcome in self._samples) / len(self._samples)
+        previous = self.limit
+        if self.failure_rate > self.max_failure_rate or self.p95 > self.target_p95:
+            self._limit = max(self.minimum, self._limit * self.decrease)
+        elif self._peak_in_flight >= previous:
+            self._limit = min(self.maximum, self._limit + self.increase)
+        if self.limit != previous:
+            print(f"{self.name} concurrency {previous} -> {self.limit} "
+                  f"(p95 {self.p95:.2f}s, timeouts/429 {self.failure_rate:.0%})")
+        self._samples.clear()
+        self._peak_in_flight = self._in_flight
+        self._last_adjust = now
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        slot = Slot()
+        start = time.monotonic()
+        try:
+            yield slot
+        except Exception as exc:
+            if slot.outcome == "ok":
+                slot.outcome = "timeout" if "Timeout" in type(exc).__name__ else "error"
+            raise
+        finally:
+            self.release(time.monotonic() - start, slot.outcome)
@@ -0,0 +1,10 @@
+from urllib.parse import quote
+
+
+def directory_page_url(base_url, letter, page_num):
+    # The letter is percent-encoded: "#" would otherwise start a fragment and
+    # every page of that letter would fetch the bare directory
+    letter = quote(letter, safe="")
+    if page_num == 1:
+        return f"{base_url}{letter}"
+    return f"{base_url}{letter}/page/{page_num}"
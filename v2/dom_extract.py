@@ -0,0 +1,79 @@
+import json
+
+from selenium.webdriver.support.ui import WebDriverWait
+
+JOB_TILE = ".JobTile___StyledJobLink-sc-989ef686-0"
+JOB_TILE_TEXT = ".JobTile-elements___StyledText-sc-e7e7aa1d-4"
+NEXT_PAGE = '[aria-label="Next page"]'
+JOB_COUNT = 'div[data-testid="TabBadge"]'
+# Selectors in use, replaced by the fallbacks the preflight probe resolved
+# (see selector_registry) when the ones above no longer match
+SELECTORS = {"job_tile": JOB_TILE, "job_tile_text": JOB_TILE_TEXT, "next_page": NEXT_PAGE, "job_count": JOB_COUNT}
+
+# Reads every job tile of the current page in one round-trip. Location and
+# contract type are taken from each tile's own text elements or, when the
+# tile has none, from its nearest ancestor that holds no other tile. Tiles
+# that share a parent get empty values rather than another tile's texts.
+EXTRACT_JOB_PAGE_JS = """
+const [tileSelector, textSelector, nextSelector, countSelector] = arguments;
+const text = (element) => (element ? element.innerText || element.textContent || '' : '').trim();
+const ownContainer = (tile) => {
+    let node = tile;
+    while (node.parentElement && node.parentElement.querySelectorAll(tileSelector).length === 1) {
+        node = node.parentElement;
+    }
+    return node;
+};
+const jobs = Array.from(document.querySelectorAll(tileSelector), (tile) => {
+    let texts = tile.querySelectorAll(textSelector);
+    if (!texts.length) {
+        texts = ownContainer(tile).querySelectorAll(textSelector);
+    }
+    const heading = tile.querySelector('h1, h2, h3, h4');
+    return {
+        title: text(heading || tile),
+        location: text(texts[0]),
+        contract_type: text(texts[1]) || 'Unknown',
+        href: tile.href || '',
+    };
+});
+return JSON.stringify({
+    title: document.title,
+    jobs: jobs,
+    has_next: document.querySelector(nextSelector) !== null,
+    total: parseInt(text(document.querySelector(countSelector)), 10) || null,
+});
+"""
+
+
+# A job page is ready as soon as a job tile is in the DOM, when the job
+# count shows 0, or when it is the 404 page. With the eager page load
+# strategy the count badge can render before the tiles, so a non-zero count
+# without tiles keeps waiting. Pages showing neither fall back to the load
+# event, so a company without openings does not time out.
+JOB_PAGE_READY_JS = """
+const [tileSelector, countSelector] = arguments;
+if (document.readyState === 'loading') return false;
+if (document.title.includes('Page not found')) return true;
+if (document.querySelector(tileSelector)) return true;
+const badge = document.querySelector(countSelector);
+if (badge) {
+    const count = parseInt((badge.innerText || badge.textContent || '').trim(), 10);
+    if (count > 0) return false;
+    if (count === 0) return true;
+}
+return document.readyState === 'complete';
+"""
+
+
+def job_page_ready(driver):
+    return bool(driver.execute_script(JOB_PAGE_READY_JS, SELECTORS["job_tile"], SELECTORS["job_count"]))
+
+
+def wait_for_job_page(driver, timeout=10):
+    WebDriverWait(driver, timeout).until(job_page_ready)
+
+
+def extract_job_page(driver):
+    return json.loads(driver.execute_script(EXTRACT_JOB_PAGE_JS, SELECTORS["job_tile"], SELECTORS["job_tile_text"],
+                                            SELECTORS["next_page"], SELECTORS["job_count"]))
@@ -0,0 +1,228 @@
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from driver_provision import CACHE_DIR, ProfileTemplate, resolve_driver
+from metrics import metrics
+
+# Requests the browser never makes, as Network.setBlockedURLs patterns.
+# CDP cannot filter by resource type from Selenium without handling
+# interception events, so resource types are matched by file extension.
+RESOURCE_TYPE_PATTERNS = {
+    "Image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico"],
+    "Font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "Stylesheet": ["*.css"],
+    "Media": ["*.mp4", "*.webm", "*.mp3"],
+}
+BLOCKED_RESOURCE_TYPES = ("Image", "Font", "Stylesheet", "Media")
+# Analytics and third-party scripts; join.com's own scripts still run since
+# the job tiles may be rendered client-side
+BLOCKED_URL_PATTERNS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*facebook.net*",
+    "*hotjar.com*", "*segment.io*", "*segment.com*", "*intercom.io*", "*hubspot.com*", "*sentry.io*",
+    "*cookiebot.com*", "*usercentrics.eu*", "*youtube.com*", "*vimeo.com*",
+]
+# Startup work no crawl needs, and which would reach the network otherwise
+FAST_START_ARGUMENTS = [
+    "--no-first-run", "--no-default-browser-check", "--disable-extensions", "--disable-default-apps",
+    "--disable-background-networking", "--disable-component-update", "--disable-sync",
+]
+
+
+def blocked_urls(resource_types=BLOCKED_RESOURCE_TYPES, url_patterns=BLOCKED_URL_PATTERNS):
+    return [pattern for resource_type in resource_types for pattern in RESOURCE_TYPE_PATTERNS[resource_type]] \
+        + list(url_patterns)
+
+
+def block_requests(driver, patterns):
+    # Applies to the current tab only, so every new tab needs it as well
+    if patterns:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+def start_edge(headless=True, driver_path=None, page_load_strategy="eager", blocked=(), user_data_dir=None):
+    # "eager" returns from get() at DOMContentLoaded instead of the load
+    # event, "none" as soon as navigation starts; callers then wait for the
+    # elements they actually need.
+    options = webdriver.EdgeOptions()
+    options.add_argument("--disable-features=SameSiteByDefaultCookies,CookiesWithoutSameSiteMustBeSecure")
+    for argument in FAST_START_ARGUMENTS:
+        options.add_argument(argument)
+    if user_data_dir is not None:
+        options.add_argument(f"--user-data-dir={user_data_dir}")
+    if headless:
+        options.add_argument("--headless")
+    prefs = {"profile.managed_default_content_settings.images": 2}
+    options.add_experimental_option("prefs", prefs)
+    options.page_load_strategy = page_load_strategy
+    if driver_path is None:
+        driver_path = resolve_driver()
+    service = webdriver.EdgeService(executable_path=driver_path)
+    driver = webdriver.Edge(service=service, options=options)
+    block_requests(driver, list(blocked))
+    return driver
+
+
+class DriverPool:
+    # Bounded set of Edge instances. Each worker thread checks one out for the
+    # duration of a unit of work instead of sharing helium's global driver.
+    # The driver binary comes from the local cache (offline=True never
+    # downloads it) and each browser starts from a copy of a warm profile.
+    # With a MemoryGovernor, a browser past its memory or navigation limit is
+    # restarted when it is checked in, between two units of work.
+
+    def __init__(self, size, headless=True, page_load_timeout=30, script_timeout=10, max_uses=500,
+                 page_load_strategy="eager", blocked=None, cache_dir=CACHE_DIR, offline=False,
+                 warm_profile=True, governor=None):
+        self.size = size
+        self.governor = governor
+        self.headless = headless
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.profile = ProfileTemplate(cache_dir) if warm_profile else None
+        self.page_load_strategy = page_load_strategy
+        self.blocked = blocked_urls() if blocked is None else list(blocked)
+        self.page_load_timeout = page_load_timeout
+        self.script_timeout = script_timeout
+        self.max_uses = max_uses
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._uses = {}
+        self._profiles = {}  # Profile copy of each browser, deleted when it quits
+        self._local = threading.local()
+        self._driver_path = None
+        self._closed = False
+
+    def _launch(self):
+        with self._lock:
+            if self._driver_path is None:
+                self._driver_path = resolve_driver(self.cache_dir, self.offline)
+        profile = None
+        if self.profile is not None:
+            self.profile.ensure(lambda directory: start_edge(self.headless, self._driver_path,
+                                                             user_data_dir=directory))
+            profile = self.profile.copy()
+        try:
+            driver = start_edge(self.headless, self._driver_path, self.page_load_strategy, self.blocked,
+                                user_data_dir=profile)
+        except Exception:
+            if profile is not None:
+                shutil.rmtree(profile, ignore_errors=True)
+            raise
+        driver.set_page_load_timeout(self.page_load_timeout)
+        driver.set_script_timeout(self.script_timeout)
+        with self._lock:
+            self._uses[driver] = 0
+            self._profiles[driver] = profile
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(driver, None)
+            profile = self._profiles.pop(driver, None)
+        if self.governor is not None:
+            self.governor.forget(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        if profile is not None:
+            shutil.rmtree(profile, ignore_errors=True)
+
+    def _recycle(self, driver):
+        self._discard(driver)
+        try:
+            return self._launch()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def configure_tab(self, driver):
+        block_requests(driver, self.blocked)
+
+    def navigate(self, driver, url):
+        driver.get(url)
+        if self.governor is not None:
+            self.governor.navigated(driver)
+
+    def is_healthy(self, driver):
+        try:
+            driver.execute_script("return 1")
+            return bool(driver.window_handles)
+        except WebDriverException:
+            return False
+
+    def checkout(self, timeout=None):
+        if self._closed:
+            raise RuntimeError("Driver pool is closed")
+        try:
+            driver = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_launch = self._created < self.size
+                if can_launch:
+                    self._created += 1
+            if can_launch:
+                try:
+                    return self._launch()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            driver = self._idle.get(timeout=timeout)
+        if not self.is_healthy(driver):
+            driver = self._recycle(driver)
+        return driver
+
+    def checkin(self, driver, suspect=False):
+        with self._lock:
+            uses = self._uses.get(driver, 0) + 1
+            self._uses[driver] = uses
+        if self._closed:
+            self._discard(driver)
+            return
+        due = self.governor.driver_due(driver) if self.governor is not None else None
+        if due is not None:
+            print(f"Restarting a browser after {self.governor.status(driver)}")
+            metrics.inc("browser_restarts_total", reason=due)
+        if uses >= self.max_uses or due is not None or (suspect and not self.is_healthy(driver)):
+            try:
+                driver = self._recycle(driver)
+            except Exception:
+                print("Could not relaunch a browser, shrinking the driver pool.")
+                return
+        self._idle.put(driver)
+
+    @contextmanager
+    def driver(self):
+        current = getattr(self._local, "driver", None)
+        if current is not None:
+            yield current
+            return
+        driver = self.checkout()
+        self._local.driver = driver
+        suspect = False
+        try:
+            yield driver
+        except WebDriverException:
+            suspect = True
+            raise
+        finally:
+            self._local.driver = None
+            self.checkin(driver, suspect=suspect)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import subprocess
+import tempfile
+import threading
+
+# Resolves the Edge driver binary once and keeps it in a local cache with
+# its checksum and version, so launching a browser needs no network:
+# webdriver_manager is only asked when nothing usable is cached or on the
+# PATH. A driver only works with the Edge major version it was built for,
+# so once Edge updated itself the cached driver is provisioned again. A
+# browser profile is warmed once, with Edge's first-run work done, and
+# every browser starts from a copy of it.
+
+CACHE_DIR = os.environ.get("SCRAPPING_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "scrapping"))
+DRIVER_ENV = "MSEDGEDRIVER"  # Explicit driver binary, e.g. on air-gapped runners
+DRIVER_NAME = "msedgedriver.exe" if os.name == "nt" else "msedgedriver"
+MANIFEST = "driver.json"
+BROWSER_ENV = "EDGE_BINARY"  # Edge executable, when it is not installed where it is looked for
+BROWSER_NAMES = ("microsoft-edge", "microsoft-edge-stable", "msedge")
+BROWSER_PATHS = ("/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge",)
+PROFILE_TEMPLATE = "profile_template"
+# Left out of profile copies: locks of the warm-up browser and caches that
+# are rebuilt on demand anyway
+PROFILE_IGNORE = shutil.ignore_patterns("Singleton*", "lockfile", "Cache", "Code Cache", "GPUCache",
+                                        "ShaderCache", "GrShaderCache", "Crashpad", "*.log")
+
+
+class DriverProvisionError(RuntimeError):
+    pass
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def driver_version(path):
+    # Runs the binary once, which also proves it works on this machine
+    try:
+        result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        raise DriverProvisionError(f"{path} does not run: {exc}")
+    if result.returncode != 0:
+        raise DriverProvisionError(f"{path} --version exited with {result.returncode}: {result.stderr.strip()}")
+    return result.stdout.strip()
+
+
+def major_version(version):
+    match = re.search(r"(\d+)\.\d+", version or "")
+    return int(match.group(1)) if match else None
+
+
+def browser_version():
+    # Version of the installed Edge, read locally, or None when it cannot be told
+    if os.name == "nt":
+        # msedge.exe --version prints nothing on Windows
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Microsoft\Edge\BLBeacon") as key:
+                return winreg.QueryValueEx(key, "version")[0]
+        except OSError:
+            return None
+    candidates = [os.environ.get(BROWSER_ENV)] + [shutil.which(name) for name in BROWSER_NAMES] + list(BROWSER_PATHS)
+    for path in candidates:
+        if not path or not os.path.isfile(path):
+            continue
+        try:
+            result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=10)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
+    return None
+
+
+def cached_driver(cache_dir=CACHE_DIR, browser_major=None):
+    # Path of the cached driver if it is still the binary that was verified
+    # and, when the Edge version is known, built for it; else None
+    try:
+        with open(os.path.join(cache_dir, MANIFEST), encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    path = manifest.get("path")
+    if not path or not os.path.isfile(path) or not os.access(path, os.X_OK):
+        return None
+    if file_sha256(path) != manifest.get("sha256"):
+        print(f"Cached driver {path} changed since it was verified, provisioning it again")
+        return None
+    if browser_major is not None and manifest.get("driver_major") != browser_major:
+        print(f"Cached driver is for Edge {manifest.get('driver_major')} but Edge {browser_major} is installed, "
+              f"provisioning it again")
+        return None
+    return path
+
+
+def cache_driver(source, cache_dir=CACHE_DIR, browser_major=None):
+    # Verifies a driver binary, copies it into the cache and records its
+    # checksum and version
+    version = driver_version(source)
+    if browser_major is not None and major_version(version) != browser_major:
+        raise DriverProvisionError(f"{source} is {version or 'of an unknown version'}, "
+                                   f"but Edge {browser_major} is installed")
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, DRIVER_NAME)
+    if os.path.abspath(source) != os.path.abspath(path):
+        shutil.copy2(source, path)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    manifest = {"path": path, "sha256": file_sha256(path), "version": version, "source": source,
+                "driver_major": major_version(version), "browser_major": browser_major}
+    staging = os.path.join(cache_dir, MANIFEST + ".tmp")
+    with open(staging, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(staging, os.path.join(cache_dir, MANIFEST))
+    print(f"Cached {manifest['version'] or DRIVER_NAME} at {path}")
+    return path
+
+
+def resolve_driver(cache_dir=CACHE_DIR, offline=False):
+    # Checked in order: $MSEDGEDRIVER, the cache, msedgedriver on the PATH,
+    # then a download through webdriver_manager unless offline. Cached and
+    # PATH drivers must match the installed Edge's major version when it
+    # can be read.
+    explicit = os.environ.get(DRIVER_ENV)
+    if explicit:
+        if not os.path.isfile(explicit):
+            raise DriverProvisionError(f"{DRIVER_ENV} points to {explicit}, which does not exist")
+        return explicit
+    browser_major = major_version(browser_version())
+    path = cached_driver(cache_dir, browser_major)
+    if path is not None:
+        return path
+    source = shutil.which(DRIVER_NAME)
+    if source is not None and browser_major is not None and major_version(driver_version(source)) != browser_major:
+        print(f"{source} does not match Edge {browser_major}, ignoring it")
+        source = None
+    if source is None:
+        if offline:
+            wanted = f"{DRIVER_NAME} for Edge {browser_major}" if browser_major else f"verified {DRIVER_NAME}"
+            raise DriverProvisionError(f"No {wanted} in {cache_dir} or on the PATH; "
+                                       f"run once with network access or set {DRIVER_ENV}")
+        from webdriver_manager.microsoft import EdgeChromiumDriverManager
+        source = EdgeChromiumDriverManager().install()
+    return cache_driver(source, cache_dir, browser_major)
+
+
+class ProfileTemplate:
+    # A browser profile launched once so first-run setup, default
+    # preferences and component registration are already on disk. A profile
+    # can only be open in one browser at a time, so each browser gets a copy.
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, PROFILE_TEMPLATE)
+        self._lock = threading.Lock()
+
+    def ensure(self, launch):
+        # launch(user_data_dir) starts a browser on that profile directory
+        with self._lock:
+            if os.path.isdir(self.path):
+                return
+            os.makedirs(self.cache_dir, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix="profile_", dir=self.cache_dir)
+            try:
+                driver = launch(staging)
+                try:
+                    driver.get("about:blank")
+                finally:
+                    driver.quit()
+                os.replace(staging, self.path)
+            except Exception:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+
+    def copy(self):
+        directory = tempfile.mkdtemp(prefix="edge_profile_")
+        shutil.copytree(self.path, directory, symlinks=True, ignore=PROFILE_IGNORE, dirs_exist_ok=True)
+        return directory
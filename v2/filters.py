@@ -0,0 +1,44 @@
+import re
+from urllib.parse import urlsplit
+
+
+class FilterSpec:
+    # Which jobs and companies a crawl is after, declared once and applied as
+    # early as each stage allows:
+    # - locations: a job is kept if its location contains one of them (empty
+    #   keeps every location)
+    # - keywords: keywords that count towards keeping a company (None for all)
+    # - contract_types: contract types kept, case-insensitive (None for all)
+    # - exclude_companies: regexes on the company URL slug, applied to the
+    #   directory listing before a company is fetched at all
+    # - first_match_only: the crawl only needs to know whether a company
+    #   matches, so pagination stops at the first kept job with a keyword
+    # - server_params: query parameters added to company page URLs, for
+    #   filters the site applies itself. join.com company pages document
+    #   none, so it is empty by default.
+
+    def __init__(self, locations=("Suisse",), keywords=None, contract_types=None, exclude_companies=(),
+                 first_match_only=False, server_params=None):
+        self.locations = tuple(locations)
+        self.keywords = set(keywords) if keywords is not None else None
+        self.contract_types = {value.lower() for value in contract_types} if contract_types is not None else None
+        self.exclude_companies = [re.compile(pattern, re.IGNORECASE) for pattern in exclude_companies]
+        self.first_match_only = first_match_only
+        self.server_params = dict(server_params or {})
+
+    def keeps_job(self, job):
+        location = job["location"] or ""
+        if self.locations and not any(wanted in location for wanted in self.locations):
+            return False
+        contract_type = (job["contract_type"] or "Unknown").lower()
+        return self.contract_types is None or contract_type in self.contract_types
+
+    def counted_keywords(self, found):
+        return found if self.keywords is None else found & self.keywords
+
+    def skips_company(self, company_url):
+        slug = urlsplit(company_url).path.rstrip("/").rsplit("/", 1)[-1]
+        return any(pattern.search(slug) for pattern in self.exclude_companies)
+
+
+DEFAULT_FILTER = FilterSpec()
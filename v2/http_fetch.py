@@ -0,0 +1,111 @@
+import os
+from contextlib import nullcontext
+from urllib.parse import urljoin
+
+import lxml.html
+import requests
+from lxml.cssselect import CSSSelector
+from requests.adapters import HTTPAdapter
+
+from concurrency import Slot
+from metrics import metrics
+from urls import canonical_company_url, url_class
+
+# Point JOIN_BASE_URL at a local stand-in server to crawl it instead of join.com
+BASE_URL = os.environ.get("JOIN_BASE_URL", "https://join.com/companies/")
+NOT_FOUND_TITLE = "Page not found (404)"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36 Edg/124.0"
+
+TOP_TITLE = CSSSelector("#pcd_top_title")
+COMPANY_LINKS = CSSSelector("a.pcd_list_company_link")
+PAGINATION_LINKS = CSSSelector("a.pcd_pagination_link")
+TITLE = CSSSelector("title")
+
+
+class Page:
+    def __init__(self, url, status_code, text):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self._tree = None
+
+    @property
+    def tree(self):
+        if self._tree is None:
+            self._tree = lxml.html.fromstring(self.text or "<html></html>")
+        return self._tree
+
+    @property
+    def title(self):
+        titles = TITLE(self.tree)
+        return titles[0].text_content() if titles else ""
+
+
+class HttpFetcher:
+    # Keep-alive connection pool shared by every worker thread. An optional
+    # AimdController bounds how many requests are in flight at once. With a
+    # ResponseArchive every response is recorded for later replay.
+
+    def __init__(self, pool_size=16, timeout=15, controller=None, archive=None):
+        self.timeout = timeout
+        self.controller = controller
+        self.archive = archive
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en"})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url):
+        kind = url_class(url)
+        with self.controller.slot() if self.controller else nullcontext(Slot()) as slot:
+            try:
+                with metrics.timer("http_request_seconds", engine="threads", url_class=kind):
+                    response = self.session.get(url, timeout=self.timeout)
+            except requests.RequestException as exc:
+                slot.outcome = "timeout" if isinstance(exc, requests.Timeout) else "error"
+                metrics.inc("http_errors_total", engine="threads", url_class=kind, error=slot.outcome)
+                print(f"HTTP fetch failed for {url}: {exc}")
+                return None
+            metrics.inc("http_responses_total", engine="threads", url_class=kind, status=response.status_code)
+            if response.status_code == 429:
+                slot.outcome = "throttled"
+        if self.archive is not None:
+            self.archive.record(url, response.status_code, response.text)
+        return Page(response.url, response.status_code, response.text)
+
+    def close(self):
+        self.session.close()
+
+
+def is_transient(page):
+    # No response, throttled or server error: worth another attempt later
+    return page is None or page.status_code == 429 or page.status_code >= 500
+
+
+def is_not_found(page):
+    return page.status_code == 404 or NOT_FOUND_TITLE in page.title
+
+
+def is_directory_page(page):
+    return page is not None and page.status_code == 200 and bool(TOP_TITLE(page.tree))
+
+
+def company_links(page):
+    return [canonical_company_url(urljoin(page.url, link.get("href"))) for link in COMPANY_LINKS(page.tree) if link.get("href")]
+
+
+def pagination_count(page):
+    return len(PAGINATION_LINKS(page.tree))
+
+
+def company_status(page):
+    # Same answer check_company_status derives from <title>; None when the
+    # HTTP response is not conclusive and the browser has to decide.
+    if page is None:
+        return None
+    if is_not_found(page):
+        return False
+    if page.status_code == 200:
+        return True
+    return None
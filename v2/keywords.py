@@ -0,0 +1,77 @@
+import json
+import re
+
+# Keyword -> terms matched in job titles, case-insensitively and on word
+# boundaries, so "sre" no longer matches "pressure" or "Ressources". A space
+# in a term also matches a hyphen ("site-reliability"); a trailing * lets
+# the term continue into a longer word, for prefixes and German compounds
+# ("daten*" matches "Datenanalyst").
+# The default keeps the meaning of the old substring checks, adding only
+# spellings and the French/German word for the same thing. Broader terms
+# such as "analyst", "BI" or "platform engineer" would change which
+# companies are kept; pass them in a taxonomy of your own (from_json).
+DEFAULT_TAXONOMY = {
+    "Data": ["data*", "données", "donnees", "daten*"],
+    "Devops": ["devops", "dev ops"],
+    "SRE": ["sre", "site reliability*", "fiabilité des sites"],
+    "Analytics": ["analytics", "analytique", "analytik"],
+}
+MAX_KEYWORDS = 64  # One bit per keyword in a mask
+
+
+def _term_pattern(term):
+    prefix = term.endswith("*")
+    words = [re.escape(word) for word in term.rstrip("*").split()]
+    return r"\b" + r"[\s\-]+".join(words) + (r"\w*" if prefix else r"\b")
+
+
+class KeywordClassifier:
+    # Compiles a taxonomy into a single regex with one named group per
+    # keyword, so a title is classified in one pass. Longer terms are tried
+    # first so a phrase wins over a word it starts with. Masks use the
+    # narrowest unsigned integer type with a bit for every keyword.
+
+    def __init__(self, taxonomy=None):
+        self.taxonomy = taxonomy or DEFAULT_TAXONOMY
+        self.keywords = tuple(self.taxonomy)
+        if len(self.keywords) > MAX_KEYWORDS:
+            raise ValueError(f"A taxonomy can have at most {MAX_KEYWORDS} keywords, this one has {len(self.keywords)}")
+        self.mask_dtype = next(f"uint{bits}" for bits in (8, 16, 32, 64) if len(self.keywords) <= bits)
+        self._groups = {f"k{index}": keyword for index, keyword in enumerate(self.keywords)}
+        alternatives = []
+        for group, keyword in self._groups.items():
+            terms = sorted(self.taxonomy[keyword], key=len, reverse=True)
+            alternatives.append(f"(?P<{group}>" + "|".join(_term_pattern(term) for term in terms) + ")")
+        self.pattern = re.compile("|".join(alternatives), re.IGNORECASE)
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, encoding="utf-8") as handle:
+            return cls(json.load(handle))
+
+    def matches(self, title):
+        # Set of keywords found in one title
+        return {self._groups[match.lastgroup] for match in self.pattern.finditer(title or "")}
+
+    def classify(self, title):
+        found = self.matches(title)
+        return {keyword: keyword in found for keyword in self.keywords}
+
+    def mask(self, title):
+        # Keywords packed into one integer, bit i set for self.keywords[i]
+        found = self.matches(title)
+        return sum(1 << bit for bit, keyword in enumerate(self.keywords) if keyword in found)
+
+    def classify_series(self, titles):
+        # Vectorized over a pandas Series of titles: a DataFrame with one
+        # boolean column per keyword, on the same index. Stored jobs can be
+        # reclassified with a new taxonomy this way, without crawling again.
+        found = titles.fillna("").str.extractall(self.pattern).notna().groupby(level=0).any()
+        found = found.rename(columns=self._groups).reindex(index=titles.index, columns=list(self.keywords))
+        return found.fillna(False).astype(bool)
+
+    def mask_series(self, titles):
+        flags = self.classify_series(titles)
+        import numpy as np  # Comes with pandas
+        weights = np.array([1 << bit for bit in range(len(self.keywords))], dtype=self.mask_dtype)
+        return (flags.astype(self.mask_dtype) * weights).sum(axis=1).astype(self.mask_dtype)
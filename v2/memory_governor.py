@@ -0,0 +1,154 @@
+import os
+import threading
+
+# Keeps browser memory bounded on long crawls. Renderer state piles up in
+# a browser that is never restarted, so a browser is restarted once its
+# process tree's memory or its navigation count passes a limit, and a tab
+# is reopened after a number of navigations of its own.
+#
+# Memory is the proportional set size (PSS) summed over the browser's
+# processes: each page shared by n Edge processes counts 1/n in each, so
+# the sum is what the browser really holds, where summed RSS would count
+# the shared browser code and memory once per renderer. It comes from
+# psutil when it is installed, else from /proc/<pid>/smaps_rollup; where
+# neither gives PSS it falls back to USS (psutil) or RSS, and without
+# either only the navigation counts apply.
+
+
+def browser_pid(driver):
+    # The driver process started by Selenium; the browser and its renderers are its descendants
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+def _proc_memory(pid, rss_pages, page_size):
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass  # Older kernels, or a process of another user
+    return rss_pages * page_size
+
+
+def _proc_tree_memory(pid):
+    if not os.path.isdir("/proc"):
+        return None
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    children, rss = {}, {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as file:
+                fields = file.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue  # Exited while the tree was walked
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        rss[int(entry)] = int(fields[21])
+    if pid not in rss:
+        return None
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += _proc_memory(current, rss.get(current, 0), page_size)
+        stack += children.get(current, [])
+    return total
+
+
+def process_tree_memory(pid):
+    # Memory in bytes held by a process and all its descendants, or None
+    try:
+        import psutil
+    except ImportError:
+        return _proc_tree_memory(pid)
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    total = 0
+    for process in processes:
+        try:
+            info = process.memory_full_info()
+        except psutil.AccessDenied:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+            continue
+        except psutil.Error:
+            continue
+        total += getattr(info, "pss", None) or info.uss
+    return total
+
+
+class MemoryGovernor:
+    # Navigation counts per browser and per tab, and the last memory sample
+    # per browser. Memory is sampled every sample_every navigations since walking
+    # the process tree takes a few milliseconds. Once a browser is due for a
+    # restart it stays due until forget() is called for it.
+
+    def __init__(self, max_memory_mb=1500, max_navigations=2000, tab_navigations=200, sample_every=25):
+        self.max_memory = max_memory_mb * 1024 * 1024 if max_memory_mb else None
+        self.max_navigations = max_navigations
+        self.tab_navigations = tab_navigations
+        self.sample_every = sample_every
+        self._lock = threading.Lock()
+        self._navigations = {}
+        self._tab_navigations = {}  # (driver, window handle) -> navigations
+        self._memory = {}
+        self._due = {}
+
+    def navigated(self, driver, handle=None):
+        with self._lock:
+            count = self._navigations.get(driver, 0) + 1
+            self._navigations[driver] = count
+            if handle is not None:
+                self._tab_navigations[driver, handle] = self._tab_navigations.get((driver, handle), 0) + 1
+        if self.max_memory and count % self.sample_every == 0:
+            self.sample(driver)
+
+    def sample(self, driver):
+        pid = browser_pid(driver)
+        memory = process_tree_memory(pid) if pid is not None else None
+        if memory is not None:
+            with self._lock:
+                self._memory[driver] = memory
+        return memory
+
+    def driver_due(self, driver):
+        # "memory", "navigations" or None
+        with self._lock:
+            if driver in self._due:
+                return self._due[driver]
+            reason = None
+            if self.max_navigations and self._navigations.get(driver, 0) >= self.max_navigations:
+                reason = "navigations"
+            elif self.max_memory and self._memory.get(driver, 0) >= self.max_memory:
+                reason = "memory"
+            if reason is not None:
+                self._due[driver] = reason
+            return reason
+
+    def tab_due(self, driver, handle):
+        with self._lock:
+            return bool(self.tab_navigations) and self._tab_navigations.get((driver, handle), 0) >= self.tab_navigations
+
+    def tab_closed(self, driver, handle):
+        with self._lock:
+            self._tab_navigations.pop((driver, handle), None)
+
+    def status(self, driver):
+        with self._lock:
+            memory = self._memory.get(driver)
+            navigations = self._navigations.get(driver, 0)
+        return f"{navigations} navigations" + (f", {memory / 1024 / 1024:.0f} MB in use" if memory is not None else "")
+
+    def forget(self, driver):
+        with self._lock:
+            for table in (self._navigations, self._memory, self._due):
+                table.pop(driver, None)
+            for key in [key for key in self._tab_navigations if key[0] is driver]:
+                del self._tab_navigations[key]
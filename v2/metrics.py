@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Counters, latency histograms and gauges for every crawl stage, served as
+# Prometheus text on /metrics and as JSON on /metrics.json, and printed as a
+# summary at the end of a run. Modules record into the shared `metrics`.
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _label_text(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction):
+        # Upper bound of the bucket the quantile falls in
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # name -> {label key: value}
+        self._histograms = {}  # name -> {label key: Histogram}
+        self._gauges = {}  # name -> {label key: callable}
+        self.started = time.time()
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _key(labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start, **labels)
+
+    def gauge(self, name, read, **labels):
+        # read() is called whenever the metrics are collected
+        with self._lock:
+            self._gauges.setdefault(name, {})[_key(labels)] = read
+
+    def _gauge_values(self):
+        with self._lock:
+            gauges = {name: dict(series) for name, series in self._gauges.items()}
+        values = {}
+        for name, series in gauges.items():
+            for key, read in series.items():
+                try:
+                    values.setdefault(name, {})[key] = float(read())
+                except Exception:
+                    continue
+        return values
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines += [f"{name}{_label_text(key)} {value}" for key, value in sorted(series.items())]
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_label_text(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{_label_text(key)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_label_text(key)} {histogram.count}")
+        for name, series in sorted(self._gauge_values().items()):
+            lines.append(f"# TYPE {name} gauge")
+            lines += [f"{name}{_label_text(key)} {value:g}" for key, value in sorted(series.items())]
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self):
+        with self._lock:
+            counters = {name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                        for name, series in self._counters.items()}
+            histograms = {
+                name: [{"labels": dict(key), "count": histogram.count, "sum": round(histogram.sum, 6),
+                        "p50": histogram.quantile(0.5), "p95": histogram.quantile(0.95),
+                        "p99": histogram.quantile(0.99)}
+                       for key, histogram in series.items()]
+                for name, series in self._histograms.items()
+            }
+        gauges = {name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                  for name, series in self._gauge_values().items()}
+        return {"uptime": round(time.time() - self.started, 1), "counters": counters,
+                "histograms": histograms, "gauges": gauges}
+
+    def summary(self):
+        # Final run summary: every counter, then count, mean and p95 of every
+        # histogram series, slowest total first, then the last gauge values
+        data = self.to_dict()
+        lines = [f"Run metrics after {data['uptime']:.0f}s:"]
+        for name, series in sorted(data["counters"].items()):
+            for item in series:
+                lines.append(f"  {name}{_label_text(_key(item['labels']))}: {item['value']}")
+        timings = [(item["sum"], name, item) for name, series in data["histograms"].items() for item in series]
+        for total, name, item in sorted(timings, key=lambda timing: timing[0], reverse=True):
+            mean = total / item["count"] if item["count"] else 0
+            lines.append(f"  {name}{_label_text(_key(item['labels']))}: {item['count']} in {total:.1f}s, "
+                         f"mean {mean * 1000:.0f} ms, p95 <= {item['p95']}s")
+        for name, series in sorted(data["gauges"].items()):
+            for item in series:
+                lines.append(f"  {name}{_label_text(_key(item['labels']))} at the end: {item['value']:g}")
+        return "\n".join(lines)
+
+    def serve(self, port, host="127.0.0.1"):
+        # Serves the metrics from a daemon thread for the rest of the run
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, content_type = json.dumps(registry.to_dict()), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, content_type = registry.prometheus_text(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                payload = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+metrics = Metrics()
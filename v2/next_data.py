@@ -0,0 +1,108 @@
+import json
+import re
+
+# Company pages are a Next.js app: the server embeds the page props, job list
+# included, as JSON in <script id="__NEXT_DATA__">. Reading it from the raw
+# HTML gives every job without rendering the page.
+
+NEXT_DATA = re.compile(r'<script[^>]*\bid="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+
+JOB_MARKERS = ("employmentType", "employmentTypeId", "contractType", "location", "city", "idParam", "workplaceType")
+COUNT_KEYS = ("totalCount", "total", "totalJobs", "jobsCount", "count")
+# Where the company page props keep the job list: {"items": [...],
+# "pagination": {"total": N}}, or the bare list on older pages
+JOBS_PATH = ("props", "pageProps", "jobs")
+
+
+def extract_payload(html):
+    match = NEXT_DATA.search(html or "")
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+
+def _looks_like_job(item):
+    return isinstance(item, dict) and isinstance(item.get("title"), str) and any(key in item for key in JOB_MARKERS)
+
+
+def _at(node, path):
+    for key in path:
+        if not isinstance(node, dict):
+            return None
+        node = node.get(key)
+    return node
+
+
+def _job_list(payload):
+    # (job list, dict holding its count) at JOBS_PATH, or (None, None)
+    node = _at(payload, JOBS_PATH)
+    if isinstance(node, dict):
+        job_list, parent = node.get("items"), node
+    else:
+        job_list, parent = node, _at(payload, JOBS_PATH[:-1])
+    if not isinstance(job_list, list) or not all(_looks_like_job(item) for item in job_list):
+        return None, None
+    return job_list, parent
+
+
+def _name(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        for key in ("name", "cityName", "city", "title", "label"):
+            if isinstance(value.get(key), str):
+                return value[key].strip()
+    return ""
+
+
+def _location(job):
+    location = job.get("location")
+    if isinstance(location, str):
+        return location.strip()
+    parts = []
+    if isinstance(location, dict):
+        parts = [_name(location.get("city")) or _name(location), _name(location.get("country") or location.get("countryName"))]
+    else:
+        parts = [_name(job.get("city")), _name(job.get("country") or job.get("countryName"))]
+    return ", ".join(part for part in parts if part)
+
+
+def _contract_type(job):
+    for key in ("employmentType", "contractType", "employment"):
+        name = _name(job.get(key))
+        if name:
+            return name
+    return "Unknown"
+
+
+def _count(parent):
+    if not isinstance(parent, dict):
+        return None
+    for key in COUNT_KEYS:
+        value = parent.get(key)
+        if isinstance(value, int):
+            return value
+    for value in parent.values():
+        if isinstance(value, dict):
+            for key in COUNT_KEYS:
+                if isinstance(value.get(key), int):
+                    return value[key]
+    return None
+
+
+def payload_jobs(html):
+    # Returns (jobs, total) where jobs is a list of title/location/contract type
+    # records and total the job count the payload advertises, None when it
+    # advertises none, or (None, None) when the page carries no usable payload.
+    # Without a total the jobs may be only the first page of them.
+    job_list, parent = _job_list(extract_payload(html))
+    if job_list is None:
+        return None, None
+    jobs = [
+        {"title": job["title"].strip(), "location": _location(job), "contract_type": _contract_type(job)}
+        for job in job_list
+    ]
+    return jobs, _count(parent)
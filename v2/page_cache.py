@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+
+from http_fetch import Page
+from urls import canonical_url
+
+
+class PageCache:
+    # Per-run LRU of loaded pages keyed by canonical URL, so the status check,
+    # job extraction and pagination of a company share a single load. It is
+    # bounded by its number of entries and, with max_bytes, by the total size
+    # of the entries put with a size.
+
+    def __init__(self, max_entries=2048, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        key = canonical_url(url)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return None
+
+    def put(self, url, value, size=0):
+        key = canonical_url(url)
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries[key][1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            self._entries.move_to_end(key)
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+
+    def get_or_load(self, url, load):
+        value = self.get(url)
+        if value is None:
+            value = load(url)
+            # Failures are not cached so a later attempt can load the page
+            if value is not None:
+                self.put(url, value)
+        return value
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CachingFetcher:
+    # Caches the HTML of each response rather than the Page, which keeps its
+    # parsed lxml tree alive, several times the size of the HTML. A hit
+    # parses the HTML again, far cheaper than another request. Entries are
+    # sized by the length of their HTML.
+
+    def __init__(self, fetcher, cache):
+        self.fetcher = fetcher
+        self.cache = cache
+
+    def get(self, url):
+        cached = self.cache.get(url)
+        if cached is not None:
+            return Page(*cached)
+        page = self.fetcher.get(url)
+        # Throttled and server error responses are worth fetching again
+        if page is not None and page.status_code != 429 and page.status_code < 500:
+            self.cache.put(url, (page.url, page.status_code, page.text), size=len(page.text or ""))
+        return page
+
+    def close(self):
+        self.fetcher.close()
@@ -0,0 +1,30 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+PER_PAGE = 5  # Job tiles per company page on join.com
+
+
+def page_url(company_url, page_num, params=None):
+    # Page 1 is the bare company URL; params are server-side filters, merged
+    # into any query the URL already has
+    parts = urlsplit(company_url)
+    query = dict(parse_qsl(parts.query))
+    query.update(params or {})
+    query.pop("page", None)
+    if page_num > 1:
+        query["page"] = page_num
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), parts.fragment))
+
+
+def total_pages(total_jobs, per_page=PER_PAGE):
+    return max(-(-total_jobs // per_page), 1)
+
+
+def remaining_page_urls(company_url, total_jobs, per_page=PER_PAGE, params=None):
+    # Page 1 has already been read to learn the job count
+    return [page_url(company_url, page_num, params) for page_num in range(2, total_pages(total_jobs, per_page) + 1)]
+
+
+def fetch_pages(executor, fetch, urls):
+    # Dispatches every page at once and returns the results in page order
+    futures = [executor.submit(fetch, url) for url in urls]
+    return [future.result() for future in futures]
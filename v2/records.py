@@ -0,0 +1,54 @@
+# Company records shared by the threaded and asyncio crawl paths
+from filters import DEFAULT_FILTER
+from keywords import KeywordClassifier
+
+classifier = KeywordClassifier()
+KEYWORDS = classifier.keywords
+ROW_COLUMNS = ["Company URL", "Status", *KEYWORDS, "Location", "Contract Type"]
+
+
+def keyword_mask(flags):
+    # Keyword flags packed into one integer, bit i set for KEYWORDS[i]
+    return sum(1 << bit for bit, keyword in enumerate(KEYWORDS) if flags[keyword])
+
+
+def inactive_company(company_url):
+    job_keywords = dict.fromkeys(KEYWORDS, False)
+    return {"Company URL": company_url, "Status": False, **job_keywords, "Locations": [], "Contract Types": [], "Jobs": []}
+
+
+def summarize_jobs(company_url, jobs, spec=DEFAULT_FILTER):
+    job_keywords = dict.fromkeys(KEYWORDS, False)
+    locations = []
+    contract_types = []
+    for job in jobs:
+        # Proceed only with jobs the filter keeps (by default, location contains "Suisse")
+        if spec.keeps_job(job):
+            locations.append(job["location"])
+            contract_types.append(job["contract_type"] or "Unknown")
+            for keyword in spec.counted_keywords(classifier.matches(job["title"])):
+                job_keywords[keyword] = True
+    # Jobs keeps every extracted job, Suisse or not, for the checkpoint store
+    return {"Company URL": company_url, "Status": True, **job_keywords, "Locations": locations, "Contract Types": contract_types, "Jobs": jobs}
+
+
+def decided(jobs, spec=DEFAULT_FILTER):
+    # Whether the jobs seen so far already settle what the crawl needs, so
+    # the remaining pages of the company can be skipped
+    return spec.first_match_only and any(
+        spec.keeps_job(job) and spec.counted_keywords(classifier.matches(job["title"])) for job in jobs
+    )
+
+
+def company_rows(company):
+    url = company["Company URL"]
+    status = company["Status"]
+    job_keywords = {key: company[key] for key in KEYWORDS}
+    locations, contract_types = company["Locations"], company["Contract Types"]
+    results = []
+    any_job_keyword_true = any(job_keywords.values())
+    if status and any_job_keyword_true:
+        for location, contract_type in zip(locations, contract_types):
+            result = {"Company URL": url, "Status": status, **job_keywords, "Location": location, "Contract Type": contract_type}
+            results.append(result)
+    return results
@@ -0,0 +1,77 @@
+import argparse
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from archive import ResponseArchive
+from http_fetch import NOT_FOUND_TITLE
+
+# Local stand-in for join.com serving a recorded ResponseArchive, with
+# configurable latency, jitter, error and 404 rates. Point both fetch paths
+# at it with JOIN_BASE_URL=http://127.0.0.1:<port>/companies/: company links
+# in replayed pages are rewritten to this server, so the browser follows
+# them here as well.
+#
+#   python replay_server.py crawl_archive.sqlite3 --port 8765 --latency 0.2 --jitter 0.1 --error-rate 0.02
+
+NOT_FOUND_PAGE = f"<html><head><title>{NOT_FOUND_TITLE}</title></head><body></body></html>"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    archive = None
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    not_found_rate = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if random.random() < self.error_rate:
+            return self.reply(503, "<html><head><title>Service Unavailable</title></head></html>")
+        if random.random() < self.not_found_rate:
+            return self.reply(404, NOT_FOUND_PAGE)
+        recorded = self.archive.lookup(self.path)
+        if recorded is None:
+            return self.reply(404, NOT_FOUND_PAGE)
+        status, text, recorded_origin = recorded
+        return self.reply(status, text.replace(recorded_origin, f"http://{self.headers['Host']}"))
+
+    def reply(self, status, text):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(archive_path, host="127.0.0.1", port=8765, latency=0.0, jitter=0.0, error_rate=0.0, not_found_rate=0.0):
+    archive = ResponseArchive(archive_path)
+    handler = type("Handler", (ReplayHandler,), {
+        "archive": archive, "latency": latency, "jitter": jitter,
+        "error_rate": error_rate, "not_found_rate": not_found_rate,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Replaying {len(archive)} pages on http://{host}:{port}/companies/")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        archive.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a recorded crawl archive as a local join.com stand-in")
+    parser.add_argument("archive")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latency varies by up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503")
+    parser.add_argument("--not-found-rate", type=float, default=0.0, help="Share of requests answered with a 404")
+    options = parser.parse_args()
+    serve(options.archive, options.host, options.port, options.latency, options.jitter,
+          options.error_rate, options.not_found_rate)
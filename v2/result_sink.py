@@ -0,0 +1,91 @@
+import csv
+import json
+import os
+import threading
+import time
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".parquet": "parquet"}
+
+
+class ResultSink:
+    # Appends result rows to a CSV, JSONL or Parquet file as they come in.
+    # Rows are buffered and written every `batch_size` rows or
+    # `flush_interval` seconds, so memory stays bounded by one batch however
+    # many companies are crawled. CSV and JSONL files can be read while the
+    # crawl runs; a Parquet file only gets its footer on close().
+
+    def __init__(self, path, columns, batch_size=500, flush_interval=5.0, file_format=None):
+        self.path = path
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.format = file_format or FORMATS.get(os.path.splitext(path)[1].lower())
+        if self.format not in FORMATS.values():
+            raise ValueError(f"Unsupported result format for {path}")
+        self.rows_written = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._handle = None
+        self._writer = None
+        self._open()
+
+    def _open(self):
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            self._schema = None
+            self._pa, self._pq = pa, pq
+            return
+        self._handle = open(self.path, "w", encoding="utf-8", newline="")
+        if self.format == "csv":
+            self._writer = csv.DictWriter(self._handle, fieldnames=self.columns, extrasaction="ignore")
+            self._writer.writeheader()
+            self._handle.flush()
+
+    def write(self, rows):
+        with self._lock:
+            self._buffer.extend(rows)
+            if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self):
+        rows, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        if not rows:
+            return
+        if self.format == "csv":
+            self._writer.writerows(rows)
+        elif self.format == "jsonl":
+            self._handle.writelines(
+                json.dumps({column: row.get(column) for column in self.columns}, ensure_ascii=False) + "\n"
+                for row in rows
+            )
+        else:
+            table = self._pa.Table.from_pylist(
+                [{column: row.get(column) for column in self.columns} for row in rows], schema=self._schema
+            )
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = self._pq.ParquetWriter(self.path, self._schema)
+            self._writer.write_table(table)  # One row group per batch
+        if self._handle is not None:
+            self._handle.flush()
+        self.rows_written += len(rows)
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self.format == "parquet":
+                if self._writer is None:
+                    # Nothing was written: an empty file with the columns only
+                    self._pq.write_table(self._pa.table({column: [] for column in self.columns}), self.path)
+                else:
+                    self._writer.close()
+            else:
+                self._handle.close()
@@ -0,0 +1,36 @@
+import hashlib
+import threading
+
+from urls import canonical_company_url
+
+
+class SeenSet:
+    # Companies already queued in this run, keyed by canonical company URL
+    # so trailing-slash, case, query and fragment variants count once. Only a 64-bit
+    # hash of each URL is kept, a fraction of the memory of the strings,
+    # and unlike a Bloom filter a collision is practically impossible, so a
+    # company is never skipped by mistake.
+
+    def __init__(self):
+        self._hashes = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(url):
+        digest = hashlib.blake2b(canonical_company_url(url).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def add(self, url):
+        # True the first time a URL is seen, False for every repeat
+        key = self._hash(url)
+        with self._lock:
+            if key in self._hashes:
+                return False
+            self._hashes.add(key)
+            return True
+
+    def __contains__(self, url):
+        return self._hash(url) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
@@ -0,0 +1,103 @@
+import json
+
+from lxml.cssselect import CSSSelector
+
+# Every selector the crawl depends on, with fallbacks in cost order: the
+# exact selector used so far, then a data-testid attribute, then a
+# structural or class-prefix selector that survives a styled-components
+# hash change. A preflight probe resolves each one to the first candidate
+# that matches on a few live pages, before any real work starts.
+
+
+class Selector:
+    def __init__(self, name, scope, candidates, required=True, per_job=False):
+        self.name = name
+        self.scope = scope  # "directory" or "company" page
+        self.candidates = candidates
+        self.required = required  # Optional ones only warn, e.g. next page links on short job lists
+        self.per_job = per_job  # Only checked on pages that report at least one job
+
+
+REGISTRY = [
+    Selector("directory_title", "directory", ["#pcd_top_title"]),
+    Selector("company_link", "directory", ["a.pcd_list_company_link"]),
+    Selector("pagination_link", "directory", ["a.pcd_pagination_link"], required=False),
+    # Without a job count, pages are followed through their next page links
+    Selector("job_count", "company", ['div[data-testid="TabBadge"]', '[data-testid="TabBadge"]',
+                                      '[class*="TabBadge"]'], required=False),
+    Selector("job_tile", "company", [".JobTile___StyledJobLink-sc-989ef686-0", '[data-testid="JobTile"] a',
+                                     '[class*="JobTile___StyledJobLink"]', 'a[href*="/jobs/"]'], per_job=True),
+    Selector("job_tile_text", "company", [".JobTile-elements___StyledText-sc-e7e7aa1d-4",
+                                          '[data-testid="JobTileText"]',
+                                          '[class*="JobTile-elements___StyledText"]'], per_job=True),
+    Selector("next_page", "company", ['[aria-label="Next page"]', 'a[rel="next"]'], required=False),
+]
+
+# Counts matches for a list of selectors on the current page, plus the job
+# count shown by the first job count candidate that is present
+PROBE_JS = """
+const [candidates, countCandidates] = arguments;
+const counts = candidates.map((css) => document.querySelectorAll(css).length);
+let total = null;
+for (const css of countCandidates) {
+    const element = document.querySelector(css);
+    if (element) {
+        total = parseInt((element.innerText || element.textContent || '').trim(), 10);
+        break;
+    }
+}
+return JSON.stringify({counts: counts, total: Number.isNaN(total) ? null : total});
+"""
+
+
+class SelectorHealthError(RuntimeError):
+    pass
+
+
+def selectors_for(scope, registry=REGISTRY):
+    return [selector for selector in registry if selector.scope == scope]
+
+
+def _candidates(selectors):
+    return [css for selector in selectors for css in selector.candidates]
+
+
+def probe_tree(tree, selectors):
+    # Match counts on a parsed HTML page; the job count is not rendered there
+    return {css: len(CSSSelector(css)(tree)) for css in _candidates(selectors)}, None
+
+
+def probe_driver(driver, selectors):
+    # Match counts on the page loaded in the browser, in one script call
+    candidates = _candidates(selectors)
+    job_count = next((selector.candidates for selector in selectors if selector.name == "job_count"), [])
+    result = json.loads(driver.execute_script(PROBE_JS, candidates, job_count))
+    return dict(zip(candidates, result["counts"])), result["total"]
+
+
+def resolve(selectors, probes):
+    # probes: (counts by candidate, job count or None) for each probed page.
+    # Returns the first matching candidate per selector name, and the names
+    # of required selectors no candidate matched. A required per-job
+    # selector fails as well when no probed page has a job count, since
+    # nothing then shows it still matches.
+    resolved, failed = {}, []
+    pages_with_jobs = [counts for counts, total in probes if total]
+    for selector in selectors:
+        pages = pages_with_jobs if selector.per_job else [counts for counts, _ in probes]
+        if not pages:
+            print(f"Selector {selector.name} unchecked: no probed page had jobs")
+            if selector.required:
+                failed.append(selector.name)
+            continue
+        match = next((css for css in selector.candidates if any(counts.get(css) for counts in pages)), None)
+        if match is None:
+            if selector.required:
+                failed.append(selector.name)
+            else:
+                print(f"Optional selector {selector.name} matched nothing on the probed pages")
+        else:
+            resolved[selector.name] = match
+            if match != selector.candidates[0]:
+                print(f"Selector {selector.name} fell back to {match}")
+    return resolved, failed
@@ -0,0 +1,170 @@
+import time
+
+from selenium.common.exceptions import TimeoutException
+
+# A job is a generator that yields the next page it needs, either a URL or a
+# (url, ready) pair, and reads the driver once resumed. ready is a CSS
+# selector to wait for or a function of the driver returning True once the
+# page is usable. A page that does not get ready in time is reported by
+# throwing TimeoutException into the job at its yield. The return value is
+# the job result. TabScheduler interleaves several jobs in one browser.
+
+NAVIGATE_JS = "window.__scrappingPending = true; window.location.href = arguments[0];"
+_END = object()
+READY_JS = """
+if (window.__scrappingPending || document.readyState === 'loading') return false;
+return !arguments[0] || document.querySelector(arguments[0]) !== null;
+"""
+
+
+class BrowserRecycled(Exception):
+    # Thrown into the jobs still in flight when the browser is about to be
+    # restarted, so they can hand their work back
+    pass
+
+
+def split_target(target):
+    if isinstance(target, str):
+        return target, None
+    return target
+
+
+class TabScheduler:
+    # Drives several jobs concurrently inside one browser, one job per tab.
+    # Navigations are issued without blocking, then every pending tab is
+    # polled in turn and its job resumed as soon as its page is ready.
+    # The job source may yield None when it has no job yet; the scheduler
+    # keeps polling its tabs and asks again on the next round.
+    # on_new_tab(driver) is called with each tab it opens focused, for
+    # per-tab settings such as request blocking.
+    # With a MemoryGovernor, a tab is reopened once it finishes a job past
+    # its navigation limit, and once the browser is due for a restart the
+    # jobs in flight get BrowserRecycled and run() returns early, leaving
+    # the reason in self.recycled.
+
+    def __init__(self, driver, tabs=4, page_timeout=30, poll_interval=0.05, on_new_tab=None, governor=None):
+        self.driver = driver
+        self.on_new_tab = on_new_tab
+        self.governor = governor
+        self.recycled = None
+        self.tabs = tabs
+        self.page_timeout = page_timeout
+        self.poll_interval = poll_interval
+
+    def _new_tab(self):
+        self.driver.switch_to.new_window("tab")
+        if self.on_new_tab is not None:
+            self.on_new_tab(self.driver)
+        return self.driver.current_window_handle
+
+    def _open_tabs(self):
+        handles = [self.driver.current_window_handle]
+        for _ in range(self.tabs - 1):
+            handles.append(self._new_tab())
+        return handles
+
+    def _reopen_tab(self, handles, handle):
+        # Swaps a worn tab for a fresh one, dropping its renderer state
+        self.driver.switch_to.window(handle)
+        fresh = self._new_tab()
+        self.driver.switch_to.window(handle)
+        self.driver.close()
+        self.driver.switch_to.window(fresh)
+        self.governor.tab_closed(self.driver, handle)
+        handles[handles.index(handle)] = fresh
+        return fresh
+
+    def _finished(self, handles, handle):
+        # The tab to put back in the idle list once a job finished on handle
+        if self.governor is not None and self.governor.tab_due(self.driver, handle):
+            return self._reopen_tab(handles, handle)
+        return handle
+
+    def _hand_back(self, pending):
+        for job, _, _ in pending.values():
+            try:
+                job.throw(BrowserRecycled(self.recycled))
+            except (StopIteration, BrowserRecycled):
+                continue
+            job.close()  # It wanted another page instead
+        pending.clear()
+
+    def _close_tabs(self, handles):
+        for handle in handles[1:]:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except Exception:
+                pass
+        self.driver.switch_to.window(handles[0])
+
+    def _is_ready(self, ready):
+        if callable(ready):
+            return self.driver.execute_script(READY_JS, None) and ready(self.driver)
+        return self.driver.execute_script(READY_JS, ready)
+
+    def _step(self, handle, job, error=None):
+        # Resume the job on its tab; returns the wait selector and deadline of
+        # the navigation it issued, or raises StopIteration when it finishes.
+        self.driver.switch_to.window(handle)
+        target = job.throw(error) if error is not None else job.send(None)
+        url, ready = split_target(target)
+        self.driver.execute_script(NAVIGATE_JS, url)
+        if self.governor is not None:
+            self.governor.navigated(self.driver, handle)
+        return ready, time.monotonic() + self.page_timeout
+
+    def run(self, jobs):
+        jobs = iter(jobs)
+        exhausted = False
+        handles = self._open_tabs()
+        idle = list(handles)
+        pending = {}
+        try:
+            while True:
+                if self.governor is not None:
+                    self.recycled = self.governor.driver_due(self.driver)
+                    if self.recycled is not None:
+                        self._hand_back(pending)
+                        return
+                while idle and not exhausted:
+                    job = next(jobs, _END)
+                    if job is _END:
+                        exhausted = True
+                    if job is None or job is _END:
+                        break
+                    handle = idle.pop()
+                    try:
+                        ready, deadline = self._step(handle, job)
+                        pending[handle] = (job, ready, deadline)
+                    except StopIteration as stop:
+                        idle.append(self._finished(handles, handle))
+                        yield stop.value
+                if not pending:
+                    if exhausted:
+                        return
+                    continue
+
+                progressed = False
+                for handle, (job, ready, deadline) in list(pending.items()):
+                    self.driver.switch_to.window(handle)
+                    if self._is_ready(ready):
+                        error = None
+                    elif time.monotonic() > deadline:
+                        error = TimeoutException(f"Tab did not become ready within {self.page_timeout}s")
+                    else:
+                        continue
+                    progressed = True
+                    try:
+                        ready, deadline = self._step(handle, job, error)
+                        pending[handle] = (job, ready, deadline)
+                    except StopIteration as stop:
+                        del pending[handle]
+                        idle.append(self._finished(handles, handle))
+                        yield stop.value
+                if not progressed:
+                    time.sleep(self.poll_interval)
+        finally:
+            for job, _, _ in pending.values():
+                job.close()
+            self._close_tabs(handles)
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from records import classifier, keyword_mask
+from urls import directory_letter
+
+# Normalized output: one companies table and one jobs table keyed by
+# company_id, instead of one CSV row per (company, location, contract type).
+# Keyword flags are a bitmask (bit i for KEYWORDS[i]), in the narrowest
+# unsigned integer type that fits the taxonomy, so stored jobs can be
+# reclassified with classifier.mask_series(jobs.title); location and contract
+# type are dictionary encoded and read back by pandas as categoricals. Both
+# tables are Parquet datasets partitioned by directory letter, taken from
+# the company URL for companies that were not reached through the directory.
+
+KEYWORDS_TYPE = pa.from_numpy_dtype(classifier.mask_dtype)
+COMPANIES_SCHEMA = pa.schema([
+    ("company_id", pa.int64()),
+    ("url", pa.string()),
+    ("status", pa.bool_()),
+    ("keywords", KEYWORDS_TYPE),
+    ("job_count", pa.int32()),
+    ("letter", pa.string()),
+])
+JOBS_SCHEMA = pa.schema([
+    ("company_id", pa.int64()),
+    ("title", pa.string()),
+    ("location", pa.dictionary(pa.int32(), pa.string())),
+    ("contract_type", pa.dictionary(pa.int32(), pa.string())),
+    ("keywords", KEYWORDS_TYPE),
+    ("letter", pa.string()),
+])
+
+
+def company_tables(batch):
+    # Arrow companies and jobs tables for a batch of (company id, letter, record)
+    companies = {name: [] for name in COMPANIES_SCHEMA.names}
+    jobs = {name: [] for name in JOBS_SCHEMA.names}
+    for company_id, letter, company in batch:
+        letter = letter or directory_letter(company["Company URL"])
+        company_jobs = company.get("Jobs") or []
+        companies["company_id"].append(company_id)
+        companies["url"].append(company["Company URL"])
+        companies["status"].append(bool(company["Status"]))
+        companies["keywords"].append(keyword_mask(company))
+        companies["job_count"].append(len(company_jobs))
+        companies["letter"].append(letter)
+        for job in company_jobs:
+            jobs["company_id"].append(company_id)
+            jobs["title"].append(job["title"])
+            jobs["location"].append(job["location"] or None)
+            jobs["contract_type"].append(job["contract_type"] or "Unknown")
+            jobs["keywords"].append(classifier.mask(job["title"]))
+            jobs["letter"].append(letter)
+    return pa.table(companies, schema=COMPANIES_SCHEMA), pa.table(jobs, schema=JOBS_SCHEMA)
+
+
+def write_tables(batches, directory):
+    # Writes <directory>/companies and <directory>/jobs, replacing an earlier
+    # output. Each batch becomes its own files, so memory is bounded by one
+    # batch. Returns (companies, jobs) row counts.
+    names = ("companies", "jobs")
+    counts = dict.fromkeys(names, 0)
+    for name in names:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+    for number, batch in enumerate(batches):
+        for name, table in zip(names, company_tables(batch)):
+            if table.num_rows:
+                pq.write_to_dataset(table, os.path.join(directory, name), partition_cols=["letter"],
+                                    basename_template=f"part-{number}-{{i}}.parquet")
+            counts[name] += table.num_rows
+    return counts["companies"], counts["jobs"]
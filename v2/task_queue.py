@@ -0,0 +1,196 @@
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+from metrics import metrics
+
+class RetryableError(Exception):
+    # A transient failure (timeout, 429, 5xx): the task is queued again
+    # instead of its result being recorded.
+    pass
+
+
+class Task:
+    def __init__(self, kind, url, priority=0, data=None, attempts=0, state="pending", last_error=None):
+        self.kind = kind
+        self.url = url
+        self.priority = priority
+        self.data = data or {}
+        self.attempts = attempts
+        self.state = state
+        self.last_error = last_error
+        self.not_before = 0.0
+
+    @property
+    def key(self):
+        return self.kind, self.url
+
+    def to_dict(self):
+        return {"kind": self.kind, "url": self.url, "priority": self.priority, "data": self.data,
+                "attempts": self.attempts, "state": self.state, "last_error": self.last_error}
+
+
+class TaskQueue:
+    # Work queue of directory/company tasks with per-task state and attempt
+    # count. A failed task is re-enqueued one priority level lower after an
+    # exponential backoff with full jitter, until max_attempts is reached.
+    # With a path, unfinished tasks are snapshotted to it as JSON so an
+    # interrupted crawl can pick up where it stopped. Its gauges are labelled
+    # with name, so several queues in one process each keep their own.
+
+    def __init__(self, max_attempts=6, base_delay=1.0, max_delay=120.0, path=None, save_interval=10.0,
+                 name="tasks"):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.path = path
+        self.save_interval = save_interval
+        self._ready = []  # (priority, sequence, task)
+        self._delayed = []  # (not_before, sequence, task) for tasks backing off
+        self._tasks = {}
+        self._running = 0
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._last_save = time.monotonic()
+        metrics.gauge("queue_depth", lambda: len(self._ready) + len(self._delayed), queue=name)
+        metrics.gauge("tasks_running", lambda: self._running, queue=name)
+
+    def _push(self, task):
+        if task.not_before > time.monotonic():
+            heapq.heappush(self._delayed, (task.not_before, next(self._sequence), task))
+        else:
+            heapq.heappush(self._ready, (task.priority, next(self._sequence), task))
+        self._condition.notify()
+
+    def put(self, kind, url, priority=0, data=None):
+        with self._condition:
+            if (kind, url) in self._tasks:
+                return False
+            task = Task(kind, url, priority, data)
+            self._tasks[task.key] = task
+            self._push(task)
+            return True
+
+    def get(self):
+        # Blocks until a task is due; returns None once nothing is queued or
+        # running, since only running tasks can still add work.
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, sequence, task = heapq.heappop(self._delayed)
+                    heapq.heappush(self._ready, (task.priority, sequence, task))
+                if self._ready:
+                    _, _, task = heapq.heappop(self._ready)
+                    task.state = "running"
+                    self._running += 1
+                    return task
+                if not self._delayed and not self._running:
+                    self._condition.notify_all()
+                    return None
+                self._condition.wait(self._delayed[0][0] - now if self._delayed else None)
+
+    def done(self, task):
+        with self._condition:
+            task.state = "done"
+            self._running -= 1
+            metrics.inc("tasks_done_total", kind=task.kind)
+            self._maybe_save()
+            self._condition.notify_all()
+
+    def retry(self, task, error):
+        with self._condition:
+            self._running -= 1
+            task.attempts += 1
+            task.last_error = str(error)
+            if task.attempts >= self.max_attempts:
+                task.state = "failed"
+                metrics.inc("task_failures_total", kind=task.kind)
+                print(f"Giving up on {task.kind} {task.url} after {task.attempts} attempts: {error}")
+            else:
+                task.state = "pending"
+                metrics.inc("task_retries_total", kind=task.kind)
+                task.priority += 1
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** task.attempts))
+                task.not_before = time.monotonic() + delay
+                self._push(task)
+            self._maybe_save()
+            self._condition.notify_all()
+
+    def failed(self):
+        return [task for task in self._tasks.values() if task.state == "failed"]
+
+    def counts(self):
+        counts = {}
+        for task in list(self._tasks.values()):
+            counts[task.state] = counts.get(task.state, 0) + 1
+        return counts
+
+    def _maybe_save(self):
+        if self.path and time.monotonic() - self._last_save >= self.save_interval:
+            self._save()
+
+    def _save(self):
+        snapshot = [task.to_dict() for task in self._tasks.values() if task.state != "done"]
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            json.dump(snapshot, handle)
+        os.replace(temporary, self.path)
+        self._last_save = time.monotonic()
+
+    def save(self):
+        if self.path:
+            with self._condition:
+                self._save()
+
+    def load(self):
+        # Restores unfinished tasks from the snapshot; running ones are pending
+        # again. Returns the number of tasks restored.
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with open(self.path, encoding="utf-8") as handle:
+            snapshot = json.load(handle)
+        with self._condition:
+            for item in snapshot:
+                if item["state"] == "failed":
+                    continue
+                task = Task(item["kind"], item["url"], item["priority"], item["data"], item["attempts"])
+                self._tasks[task.key] = task
+                self._push(task)
+        return len(self._ready)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def run(self, handlers, workers):
+        # handlers maps a task kind to a function taking the task; it may put
+        # follow-up tasks and raises RetryableError on transient failures.
+        def work():
+            while True:
+                task = self.get()
+                if task is None:
+                    return
+                try:
+                    handlers[task.kind](task)
+                except RetryableError as exc:
+                    self.retry(task, exc)
+                except Exception as exc:
+                    print(f"Unexpected error on {task.kind} {task.url}: {exc!r}")
+                    self.retry(task, exc)
+                else:
+                    self.done(task)
+
+        threads = [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        finally:
+            self.save()  # Also on Ctrl+C, so the run can be resumed from here
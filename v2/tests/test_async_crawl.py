@@ -0,0 +1,90 @@
+import asyncio
+
+from async_crawl import AsyncCrawler
+from concurrency import AimdController
+from http_fetch import Page
+
+
+class FakeResponse:
+    def __init__(self, url):
+        self.url = url
+        self.status = 200
+
+    async def text(self):
+        return "<html><head><title>ok</title></head></html>"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeSession:
+    def get(self, url):
+        return FakeResponse(url)
+
+
+def test_rate_limit_wait_is_not_reported_as_latency():
+    controller = AimdController("test", initial=4, maximum=4, interval=3600)
+
+    async def crawl():
+        crawler = AsyncCrawler(max_in_flight=4, rate_per_host=20.0, burst=1, controller=controller)
+        crawler.session = FakeSession()
+        crawler._semaphore = asyncio.Semaphore(4)
+        crawler._gate = asyncio.Condition()
+        return await asyncio.gather(*(crawler.fetch(f"http://example.test/companies/c{i}") for i in range(6)))
+
+    pages = asyncio.run(crawl())
+    assert all(page.status_code == 200 for page in pages)
+    # Six requests at 20/s wait up to a quarter of a second for tokens; the
+    # server answered at once
+    assert max(latency for latency, _ in controller._samples) < 0.05
+
+
+DIRECTORY = ('<html><body><h1 id="pcd_top_title">A</h1>'
+             '<a class="pcd_list_company_link" href="/companies/good">good</a>'
+             '<a class="pcd_list_company_link" href="/companies/broken">broken</a></body></html>')
+
+
+def test_failed_company_is_left_to_the_browsers():
+    async def company(company_url):
+        if company_url.endswith("/broken"):
+            raise ValueError("unexpected payload")
+        return {"url": company_url}
+
+    async def fetch(url):
+        return Page(url, 200, DIRECTORY)
+
+    async def crawl():
+        crawler = AsyncCrawler()
+        crawler.fetch = fetch
+        crawler.company = company
+        return await crawler.crawl(["a"], "http://example.test/companies/")
+
+    companies, to_render, letters_to_render, pages_to_render = asyncio.run(crawl())
+    assert companies == [{"url": "http://example.test/companies/good"}]
+    assert to_render == ["http://example.test/companies/broken"]
+    assert letters_to_render == [] and pages_to_render == []
+
+
+def test_records_are_handed_over_and_only_counted_with_on_company():
+    async def company(company_url):
+        return {"url": company_url}
+
+    async def fetch(url):
+        return Page(url, 200, DIRECTORY)
+
+    handed = []
+
+    async def crawl():
+        crawler = AsyncCrawler()
+        crawler.fetch = fetch
+        crawler.company = company
+        return await crawler.crawl(["a"], "http://example.test/companies/",
+                                   on_company=lambda url, record: handed.append(record))
+
+    settled, to_render, _, _ = asyncio.run(crawl())
+    assert settled == 2 and to_render == []
+    assert sorted(record["url"] for record in handed) == ["http://example.test/companies/broken",
+                                                          "http://example.test/companies/good"]
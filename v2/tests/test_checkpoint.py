@@ -0,0 +1,85 @@
+import sqlite3
+
+import checkpoint
+from checkpoint import MIGRATIONS, CheckpointStore, revisit_interval
+from records import inactive_company, summarize_jobs
+
+URL = "https://join.com/companies/acme"
+
+
+def test_an_unfinished_run_is_resumed(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    store = CheckpointStore(path)
+    run_id, resumed = store.start_run()
+    assert not resumed
+    store.save_directory_page("https://join.com/companies/a", run_id, [URL], 3)
+    store.close()
+
+    store = CheckpointStore(path)
+    assert store.start_run() == (run_id, True)
+    assert store.listed_directory_page("https://join.com/companies/a", run_id) == ([URL], 3)
+    store.finish_run(run_id)
+    next_run, resumed = store.start_run()
+    assert next_run != run_id and not resumed
+    assert store.listed_directory_page("https://join.com/companies/a", next_run) is None
+
+
+def test_a_company_crawled_earlier_in_the_run_is_skipped(tmp_path):
+    store = CheckpointStore(str(tmp_path / "state.sqlite3"))
+    run_id, _ = store.start_run()
+    assert store.needs_crawl(URL, run_id, "a")
+    store.save_company(URL, run_id, inactive_company(URL))
+    assert not store.needs_crawl(URL, run_id, "a")
+    assert store.company(URL)["Status"] is False
+    assert store.revisit_counts(run_id) == (1, 0)
+
+
+def test_unchanged_companies_back_off_up_to_max_revisit():
+    assert revisit_interval(None, False, 10, 100) == 10
+    assert [revisit_interval(previous, False, 10, 100) for previous in (10, 40, 80)] == [20, 80, 100]
+    assert revisit_interval(80, True, 10, 100) == 10
+
+
+def test_revisits_follow_the_fingerprint(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(checkpoint.time, "time", lambda: now[0])
+    store = CheckpointStore(str(tmp_path / "state.sqlite3"), min_revisit=10, max_revisit=30)
+    company = summarize_jobs(URL, [{"title": "Data Engineer", "location": "Zürich, Suisse", "contract_type": "Employee"}])
+    intervals = []
+    for _ in range(4):
+        run_id, _ = store.start_run()
+        assert store.needs_crawl(URL, run_id)
+        store.save_company(URL, run_id, company)
+        store.finish_run(run_id)
+        interval = store._execute("SELECT revisit_interval FROM companies WHERE url = ?", (URL,))[0][0]
+        intervals.append(interval)
+        now[0] += interval - 1
+        assert not store.needs_crawl(URL, store.start_run()[0])  # Not due yet
+        now[0] += 1
+    assert intervals == [10, 20, 30, 30]
+
+    run_id, _ = store.start_run()
+    assert store.needs_crawl(URL, run_id)
+    changed = dict(company, Jobs=company["Jobs"] * 2)
+    assert store.save_company(URL, run_id, changed)
+    assert store._execute("SELECT revisit_interval FROM companies WHERE url = ?", (URL,))[0][0] == 10
+
+
+def test_an_old_state_file_is_upgraded(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        "CREATE TABLE runs (id INTEGER PRIMARY KEY AUTOINCREMENT, started REAL NOT NULL, finished REAL);"
+        "INSERT INTO runs (started, finished) VALUES (0, 1);"
+        "CREATE TABLE companies (url TEXT PRIMARY KEY, letter TEXT, status INTEGER, content_hash TEXT, record TEXT, "
+        "last_crawled REAL, crawled_run INTEGER, last_seen_run INTEGER);"
+        "INSERT INTO companies (url, last_crawled, crawled_run, last_seen_run) VALUES ('%s', 0, 1, 1);" % URL
+    )
+    connection.close()
+    store = CheckpointStore(path, min_revisit=10)
+    columns = {row[1] for row in store._execute("PRAGMA table_info(companies)")}
+    assert set(MIGRATIONS) <= columns
+    run_id, resumed = store.start_run()
+    assert run_id == 2 and not resumed
+    # No next_due yet: due min_revisit after the last crawl, long past
+    assert store.needs_crawl(URL, run_id)
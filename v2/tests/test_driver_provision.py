@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from driver_provision import DRIVER_NAME, DriverProvisionError, major_version, resolve_driver
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="fake binaries are shell scripts")
+
+
+def fake_binary(path, output):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f'#!/bin/sh\necho "{output}"\n')
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    monkeypatch.delenv("MSEDGEDRIVER", raising=False)
+    monkeypatch.setenv("PATH", str(tmp_path / "bin"))
+    monkeypatch.setenv("EDGE_BINARY", fake_binary(tmp_path / "edge", "Microsoft Edge 130.0.2849.68"))
+    return tmp_path
+
+
+def test_major_version():
+    assert major_version("Microsoft Edge WebDriver 130.0.2849.68 (8c9d2f)") == 130
+    assert major_version(None) is None
+
+
+def test_driver_is_cached_and_reused_offline(env):
+    fake_binary(env / "bin" / DRIVER_NAME, "Microsoft Edge WebDriver 130.0.2849.68")
+    cache = str(env / "cache")
+    path = resolve_driver(cache, offline=True)
+    assert path == os.path.join(cache, DRIVER_NAME)
+    os.remove(env / "bin" / DRIVER_NAME)
+    assert resolve_driver(cache, offline=True) == path
+
+
+def test_edge_update_invalidates_the_cached_driver(env):
+    fake_binary(env / "bin" / DRIVER_NAME, "Microsoft Edge WebDriver 130.0.2849.68")
+    cache = str(env / "cache")
+    resolve_driver(cache, offline=True)
+    fake_binary(env / "edge", "Microsoft Edge 131.0.2903.48")
+    with pytest.raises(DriverProvisionError, match="Edge 131"):
+        resolve_driver(cache, offline=True)
+    fake_binary(env / "bin" / DRIVER_NAME, "Microsoft Edge WebDriver 131.0.2903.48")
+    path = resolve_driver(cache, offline=True)
+    with open(path) as file:
+        assert "131.0" in file.read()
+
+
+def test_changed_binary_is_not_trusted(env):
+    cache = str(env / "cache")
+    fake_binary(env / "bin" / DRIVER_NAME, "Microsoft Edge WebDriver 130.0.2849.68")
+    path = resolve_driver(cache, offline=True)
+    os.remove(env / "bin" / DRIVER_NAME)
+    with open(path, "a") as file:
+        file.write("# patched\n")
+    with pytest.raises(DriverProvisionError):
+        resolve_driver(cache, offline=True)
@@ -0,0 +1,29 @@
+from filters import FilterSpec
+from records import decided
+
+
+def job(title, location="Zürich, Suisse", contract_type="Employee"):
+    return {"title": title, "location": location, "contract_type": contract_type}
+
+
+def test_jobs_are_kept_by_location_and_contract_type():
+    spec = FilterSpec(locations=("Suisse",), contract_types=("employee",))
+    assert spec.keeps_job(job("Data Engineer"))
+    assert not spec.keeps_job(job("Data Engineer", location="Berlin, Deutschland"))
+    assert not spec.keeps_job(job("Data Engineer", contract_type="Internship"))
+    assert not spec.keeps_job(job("Data Engineer", location=None))
+    assert FilterSpec(locations=()).keeps_job(job("Data Engineer", location=None, contract_type=None))
+
+
+def test_excluded_companies_match_on_the_slug():
+    spec = FilterSpec(exclude_companies=[r"^staffing-"])
+    assert spec.skips_company("https://join.com/companies/Staffing-Partners/")
+    assert not spec.skips_company("https://join.com/companies/acme?ref=staffing-")
+
+
+def test_first_match_only_settles_on_a_kept_job_with_a_counted_keyword():
+    spec = FilterSpec(keywords={"SRE"}, first_match_only=True)
+    assert not decided([job("Data Engineer")], spec)
+    assert not decided([job("Site Reliability Engineer", location="Paris, France")], spec)
+    assert decided([job("Data Engineer"), job("Site Reliability Engineer")], spec)
+    assert not decided([job("Site Reliability Engineer")], FilterSpec(keywords={"SRE"}))
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from keywords import MAX_KEYWORDS, KeywordClassifier
+
+classifier = KeywordClassifier()
+
+
+def test_whole_words_only():
+    assert classifier.matches("Pressure Test Technician") == set()
+    assert classifier.matches("Chargé de Ressources Humaines") == set()
+    assert classifier.matches("SRE / Site-Reliability Engineer") == {"SRE"}
+
+
+def test_spellings_and_languages_of_the_same_terms():
+    assert classifier.matches("Datenanalyst (m/w/d)") == {"Data"}
+    assert classifier.matches("Ingénieur Données") == {"Data"}
+    assert classifier.matches("Databricks Engineer") == {"Data"}
+    assert classifier.matches("Dev-Ops Engineer") == {"Devops"}
+    assert classifier.matches("Head of Analytics & Data") == {"Analytics", "Data"}
+
+
+def test_broader_roles_are_not_counted():
+    for title in ("Business Analyst", "Financial Analyst", "BI Developer", "Platform Engineer",
+                  "Zuverlässigkeitsingenieur"):
+        assert classifier.matches(title) == set(), title
+
+
+def test_mask_and_series():
+    assert classifier.mask("Data Engineer") == 1
+    assert classifier.mask("DevOps SRE") == 0b110
+    masks = classifier.mask_series(pd.Series(["Data Engineer", None, "Analytics Lead"]))
+    assert list(masks) == [1, 0, 8]
+
+
+def test_custom_taxonomy():
+    custom = KeywordClassifier({"Analytics": ["analyst*", "bi"]})
+    assert custom.matches("BI Analyst") == {"Analytics"}
+
+
+def test_masks_widen_with_the_taxonomy():
+    wide = KeywordClassifier({f"K{index}": [f"term{index}"] for index in range(10)})
+    assert wide.mask_dtype == "uint16"
+    assert wide.mask("term9 term0") == 513
+    masks = wide.mask_series(pd.Series(["term9 term0", "term1"]))
+    assert masks.dtype == "uint16" and list(masks) == [513, 2]
+    with pytest.raises(ValueError):
+        KeywordClassifier({f"K{index}": [f"term{index}"] for index in range(MAX_KEYWORDS + 1)})
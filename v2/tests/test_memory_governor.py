@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+
+import memory_governor
+from memory_governor import MemoryGovernor, _proc_tree_memory, process_tree_memory
+
+
+class FakeProcess:
+    def __init__(self, pid):
+        self.pid = pid
+
+
+class FakeService:
+    def __init__(self, pid):
+        self.process = FakeProcess(pid)
+
+
+class FakeDriver:
+    def __init__(self, pid=None):
+        self.service = FakeService(pid)
+
+
+def test_tree_memory_includes_children():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        alone = process_tree_memory(child.pid)
+        with_child = process_tree_memory(os.getpid())
+        assert alone and with_child and with_child > alone
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_proc_fallback_counts_shared_pages_once():
+    if not os.path.isdir("/proc"):
+        return
+    children = [subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"]) for _ in range(3)]
+    try:
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        rss = 0
+        for pid in [os.getpid()] + [child.pid for child in children]:
+            with open(f"/proc/{pid}/stat", encoding="utf-8") as file:
+                rss += int(file.read().rsplit(")", 1)[1].split()[21]) * page_size
+        # The interpreters share their code pages, which summed RSS counts four times
+        assert _proc_tree_memory(os.getpid()) < rss
+    finally:
+        for child in children:
+            child.kill()
+            child.wait()
+
+
+def test_navigation_limit():
+    governor = MemoryGovernor(max_memory_mb=None, max_navigations=3)
+    driver = FakeDriver()
+    for _ in range(2):
+        governor.navigated(driver)
+    assert governor.driver_due(driver) is None
+    governor.navigated(driver)
+    assert governor.driver_due(driver) == "navigations"
+    governor.forget(driver)
+    assert governor.driver_due(driver) is None
+
+
+def test_memory_limit_is_sampled_and_sticky(monkeypatch):
+    samples = iter([100 * 1024 * 1024, 900 * 1024 * 1024, 10])
+    monkeypatch.setattr(memory_governor, "process_tree_memory", lambda pid: next(samples))
+    governor = MemoryGovernor(max_memory_mb=500, max_navigations=None, sample_every=2)
+    driver = FakeDriver(pid=1234)
+    for _ in range(2):
+        governor.navigated(driver)
+    assert governor.driver_due(driver) is None
+    for _ in range(2):
+        governor.navigated(driver)
+    assert governor.driver_due(driver) == "memory"
+    for _ in range(2):
+        governor.navigated(driver)
+    # Still due although the last sample is low: the restart is decided
+    assert governor.driver_due(driver) == "memory"
+    assert governor.status(driver) == "6 navigations, 0 MB in use"
+
+
+def test_tab_limit():
+    governor = MemoryGovernor(max_memory_mb=None, tab_navigations=2)
+    driver = FakeDriver()
+    governor.navigated(driver, "tab0")
+    assert not governor.tab_due(driver, "tab0")
+    governor.navigated(driver, "tab0")
+    assert governor.tab_due(driver, "tab0")
+    governor.tab_closed(driver, "tab0")
+    assert not governor.tab_due(driver, "tab0")
@@ -0,0 +1,39 @@
+import json
+
+from next_data import payload_jobs
+
+
+def page(data):
+    return f'<html><body><script id="__NEXT_DATA__" type="application/json">{json.dumps(data)}</script></body></html>'
+
+
+def job(title, city="Zürich"):
+    return {"title": title, "location": {"city": city, "country": "Suisse"}, "employmentType": {"name": "Full-time"}}
+
+
+def test_jobs_and_total_from_the_props_path():
+    data = {"props": {"pageProps": {"jobs": {"items": [job("Data Engineer"), job("Cook")],
+                                             "pagination": {"total": 12}}}}}
+    jobs, total = payload_jobs(page(data))
+    assert total == 12
+    assert jobs[0] == {"title": "Data Engineer", "location": "Zürich, Suisse", "contract_type": "Full-time"}
+
+
+def test_missing_total_is_unknown_not_the_page_length():
+    data = {"props": {"pageProps": {"jobs": {"items": [job("Data Engineer")]}}}}
+    assert payload_jobs(page(data)) == ([{"title": "Data Engineer", "location": "Zürich, Suisse",
+                                          "contract_type": "Full-time"}], None)
+
+
+def test_empty_job_list_with_total():
+    data = {"props": {"pageProps": {"jobs": {"items": [], "pagination": {"total": 0}}}}}
+    assert payload_jobs(page(data)) == ([], 0)
+
+
+def test_job_like_lists_elsewhere_in_the_payload_are_ignored():
+    data = {"props": {"pageProps": {"company": {"similarJobs": [job("Cook"), job("Waiter"), job("Chef")]}}}}
+    assert payload_jobs(page(data)) == (None, None)
+
+
+def test_page_without_payload():
+    assert payload_jobs("<html></html>") == (None, None)
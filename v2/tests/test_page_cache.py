@@ -0,0 +1,35 @@
+from http_fetch import Page
+from page_cache import CachingFetcher, PageCache
+
+
+class CountingFetcher:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = 0
+
+    def get(self, url):
+        self.calls += 1
+        return Page(url, 200, self.pages[url])
+
+
+def test_oldest_pages_are_dropped_past_max_bytes():
+    cache = PageCache(max_bytes=10)
+    cache.put("https://join.com/companies/a1", "first", size=4)
+    cache.put("https://join.com/companies/a2", "second", size=4)
+    cache.put("https://join.com/companies/a3", "third", size=4)
+    assert cache.get("https://join.com/companies/a1") is None
+    assert cache.get("https://join.com/companies/a3") == "third"
+    assert cache.bytes == 8
+
+
+def test_only_the_html_is_kept():
+    url = "https://join.com/companies/acme"
+    fetcher = CountingFetcher({url: "<html><head><title>Acme jobs</title></head></html>"})
+    caching = CachingFetcher(fetcher, PageCache(max_bytes=1024))
+    first = caching.get(url)
+    assert first.title == "Acme jobs"
+    second = caching.get(url + "/")
+    assert fetcher.calls == 1
+    assert second is not first and second.title == "Acme jobs"
+    cached = caching.cache.get(url)
+    assert cached == (url, 200, fetcher.pages[url])
@@ -0,0 +1,26 @@
+from selector_registry import resolve, selectors_for
+
+COMPANY = selectors_for("company")
+TILE = COMPANY[1].candidates[0]
+TEXT = COMPANY[2].candidates[0]
+BADGE = COMPANY[0].candidates[0]
+
+
+def test_resolves_first_matching_candidates():
+    probes = [({BADGE: 1, TILE: 5, TEXT: 10}, 7), ({BADGE: 1}, 0)]
+    resolved, failed = resolve(COMPANY, probes)
+    assert failed == []
+    assert resolved["job_tile"] == TILE
+    assert resolved["job_count"] == BADGE
+
+
+def test_broken_tile_selector_fails():
+    resolved, failed = resolve(COMPANY, [({BADGE: 1, TEXT: 10}, 7)])
+    assert "job_tile" in failed
+
+
+def test_no_page_with_jobs_fails_the_per_job_selectors():
+    # The count selector broke, so no page seems to have jobs: the tile
+    # selectors must not pass unchecked
+    resolved, failed = resolve(COMPANY, [({}, None), ({}, None)])
+    assert set(failed) == {"job_tile", "job_tile_text"}
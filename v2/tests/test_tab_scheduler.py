@@ -0,0 +1,92 @@
+import itertools
+
+from selenium.common.exceptions import TimeoutException
+
+from memory_governor import MemoryGovernor
+from tab_scheduler import BrowserRecycled, TabScheduler
+
+
+class FakeSwitch:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def new_window(self, kind):
+        handle = f"tab{next(self.driver.ids)}"
+        self.driver.handles.append(handle)
+        self.driver.current_window_handle = handle
+
+    def window(self, handle):
+        assert handle in self.driver.handles
+        self.driver.current_window_handle = handle
+
+
+class FakeDriver:
+    # Tabs whose page is ready once it was polled `delay` times; pages
+    # listed in `never_ready` never are
+    def __init__(self, delay=1, never_ready=()):
+        self.ids = itertools.count(1)
+        self.handles = ["tab0"]
+        self.current_window_handle = "tab0"
+        self.switch_to = FakeSwitch(self)
+        self.delay = delay
+        self.never_ready = set(never_ready)
+        self.url = {}
+        self.polls = {}
+        self.closed = []
+
+    def execute_script(self, script, *args):
+        handle = self.current_window_handle
+        if "location.href" in script:
+            self.url[handle] = args[0]
+            self.polls[handle] = 0
+            return None
+        self.polls[handle] += 1
+        return self.url[handle] not in self.never_ready and self.polls[handle] > self.delay
+
+    def close(self):
+        self.handles.remove(self.current_window_handle)
+        self.closed.append(self.current_window_handle)
+
+
+def company(name, pages, log):
+    seen = []
+    for page in range(pages):
+        try:
+            yield f"{name}/{page}", lambda driver: True
+        except TimeoutException:
+            log.append(name)
+            return None
+        seen.append(page)
+    return name, seen
+
+
+def test_timeout_is_raised_inside_the_job_and_other_tabs_go_on():
+    log = []
+    driver = FakeDriver(never_ready={"slow/0"})
+    scheduler = TabScheduler(driver, tabs=2, page_timeout=0.05, poll_interval=0)
+    results = list(scheduler.run(iter([company("slow", 1, log), company("fast", 3, log)])))
+    assert ("fast", [0, 1, 2]) in results
+    assert None in results
+    assert log == ["slow"]
+
+
+def test_worn_tabs_are_reopened_and_jobs_in_flight_handed_back():
+    handed_back = []
+
+    def job(i):
+        try:
+            yield f"u{i}a"
+            yield f"u{i}b"
+        except BrowserRecycled:
+            handed_back.append(i)
+            return None
+        return i
+
+    driver = FakeDriver()
+    governor = MemoryGovernor(max_memory_mb=None, max_navigations=9, tab_navigations=2)
+    scheduler = TabScheduler(driver, tabs=2, poll_interval=0, governor=governor)
+    results = list(scheduler.run(job(i) for i in range(10)))
+    assert results == [0, 1, 2, 3]
+    assert scheduler.recycled == "navigations"
+    assert handed_back == [4, 5]
+    assert len(driver.closed) >= 4
@@ -0,0 +1,8 @@
+from records import inactive_company
+from tables import company_tables
+
+
+def test_companies_without_a_letter_are_partitioned_by_their_slug():
+    companies, _ = company_tables([(1, None, inactive_company("https://join.com/companies/zeta")),
+                                   (2, "b", inactive_company("https://join.com/companies/beta"))])
+    assert companies.column("letter").to_pylist() == ["z", "b"]
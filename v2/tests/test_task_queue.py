@@ -0,0 +1,63 @@
+from metrics import metrics
+from task_queue import RetryableError, TaskQueue
+
+
+def test_retries_with_backoff_until_done():
+    tasks = TaskQueue(base_delay=0.001, max_delay=0.001)
+    tasks.put("company", "https://join.com/companies/acme")
+    attempts = []
+
+    def handle(task):
+        attempts.append(task.attempts)
+        if len(attempts) < 3:
+            raise RetryableError("503")
+
+    tasks.run({"company": handle}, workers=2)
+    assert attempts == [0, 1, 2]
+    assert tasks.counts() == {"done": 1}
+
+
+def test_gives_up_after_max_attempts():
+    tasks = TaskQueue(max_attempts=2, base_delay=0.001, max_delay=0.001)
+    tasks.put("company", "https://join.com/companies/acme")
+
+    def handle(task):
+        raise RetryableError("timeout")
+
+    tasks.run({"company": handle}, workers=1)
+    assert [task.url for task in tasks.failed()] == ["https://join.com/companies/acme"]
+
+
+def test_duplicate_tasks_are_queued_once():
+    tasks = TaskQueue()
+    assert tasks.put("company", "https://join.com/companies/acme")
+    assert not tasks.put("company", "https://join.com/companies/acme")
+
+
+def test_unfinished_tasks_survive_a_restart(tmp_path):
+    path = str(tmp_path / "tasks.json")
+    tasks = TaskQueue(path=path)
+    tasks.put("directory", "https://join.com/companies/a", data={"letter": "a", "page": 1})
+    tasks.put("company", "https://join.com/companies/acme", priority=1)
+    running = tasks.get()
+    tasks.retry(running, RetryableError("503"))
+    tasks.save()
+
+    restored = TaskQueue(path=path)
+    assert restored.load() == 2
+    by_url = {task.url: task for task in restored._tasks.values()}
+    assert by_url["https://join.com/companies/a"].attempts == 1
+    assert by_url["https://join.com/companies/a"].data == {"letter": "a", "page": 1}
+    restored.clear()
+    assert TaskQueue(path=path).load() == 0
+
+
+def test_each_queue_keeps_its_own_gauges():
+    companies = TaskQueue(name="companies")
+    directory = TaskQueue(name="directory")
+    companies.put("company", "https://join.com/companies/acme")
+    companies.put("company", "https://join.com/companies/globex")
+    directory.put("directory", "https://join.com/companies/a")
+    depth = metrics._gauge_values()["queue_depth"]
+    assert depth[(("queue", "companies"),)] == 2
+    assert depth[(("queue", "directory"),)] == 1
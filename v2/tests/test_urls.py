@@ -0,0 +1,53 @@
+from directory import directory_page_url
+from pagination import page_url, remaining_page_urls
+from seen_set import SeenSet
+from urls import canonical_company_url, canonical_url, directory_letter, url_class
+
+
+def test_canonical_url_keeps_the_page_but_folds_page_one():
+    assert canonical_url("HTTPS://Join.com/companies/acme/?page=1#jobs") == "https://join.com/companies/acme"
+    assert canonical_url("https://join.com/companies/acme?page=2") == "https://join.com/companies/acme?page=2"
+
+
+def test_company_url_drops_query_and_fragment():
+    assert canonical_company_url("https://join.com/companies/acme/?utm_source=x&page=3#top") \
+        == "https://join.com/companies/acme"
+
+
+def test_seen_set_ignores_tracking_parameters():
+    seen = SeenSet()
+    assert seen.add("https://join.com/companies/acme")
+    assert not seen.add("https://join.com/companies/acme/?utm_source=newsletter")
+    assert len(seen) == 1
+
+
+def test_page_url_merges_into_an_existing_query():
+    assert page_url("https://join.com/companies/acme?utm=x", 2) == "https://join.com/companies/acme?utm=x&page=2"
+    assert page_url("https://join.com/companies/acme", 1) == "https://join.com/companies/acme"
+    assert page_url("https://join.com/companies/acme?page=4", 1) == "https://join.com/companies/acme"
+    assert remaining_page_urls("https://join.com/companies/acme", 12, params={"city": "Bern"}) == [
+        "https://join.com/companies/acme?city=Bern&page=2",
+        "https://join.com/companies/acme?city=Bern&page=3",
+    ]
+
+
+def test_url_class_only_takes_letters_for_directory_pages():
+    assert url_class("https://join.com/companies/x") == "directory"
+    assert url_class("https://join.com/companies/x/page/3") == "directory"
+    assert url_class("https://join.com/companies/7") == "company"
+    assert url_class("https://join.com/companies/%C3%A9") == "company"
+    assert url_class("https://join.com/companies/7?page=2") == "job_page"
+
+
+def test_directory_letter_comes_from_the_slug():
+    assert directory_letter("https://join.com/companies/Acme/") == "a"
+    assert directory_letter("https://join.com/companies/%C3%A9cole-42") == "e"
+    assert directory_letter("https://join.com/companies/42-labs?utm=x") == "#"
+
+
+def test_hash_letter_pages_are_not_fragments():
+    first = directory_page_url("https://join.com/companies/", "#", 1)
+    second = directory_page_url("https://join.com/companies/", "#", 2)
+    assert (first, second) == ("https://join.com/companies/%23", "https://join.com/companies/%23/page/2")
+    assert canonical_url(first) != canonical_url(second) != canonical_url("https://join.com/companies/")
+    assert url_class(first) == url_class(second) == "directory"
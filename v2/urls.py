@@ -0,0 +1,45 @@
+import string
+import unicodedata
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+DIRECTORY_LETTERS = frozenset(string.ascii_lowercase + "#")
+
+
+def canonical_url(url):
+    # Same page, same key: lowercase scheme and host, no fragment, no trailing
+    # slash, sorted query, and ?page=1 folded into the bare company URL.
+    parts = urlsplit(url.strip())
+    path = parts.path.rstrip("/") or "/"
+    query = [(key, value) for key, value in parse_qsl(parts.query) if not (key == "page" and value == "1")]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
+
+
+def canonical_company_url(url):
+    # Identity of a company: its canonical URL without any query or fragment,
+    # so links carrying tracking parameters are the same company
+    parts = urlsplit(canonical_url(url))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+
+
+def directory_letter(url):
+    # Directory letter listing a company: the initial of its slug without
+    # accents, or "#" when that is not a letter
+    slug = unquote(urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1])
+    initial = unicodedata.normalize("NFKD", slug[:1]).encode("ascii", "ignore").decode("ascii").lower()
+    return initial if initial in DIRECTORY_LETTERS else "#"
+
+
+def url_class(url):
+    # "directory", "company" or "job_page" (?page=N past the first), for
+    # grouping timings by the kind of page fetched. Letter pages are
+    # companies/<a-z> and companies/%23 for "#"; any other one-character
+    # slug is a company.
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split("/") if segment]
+    if not segments or segments[-1] == "companies" or (len(segments) >= 2 and segments[-2] == "page"):
+        return "directory"
+    if any(key == "page" and value != "1" for key, value in parse_qsl(parts.query)):
+        return "job_page"
+    if len(segments) >= 2 and segments[-2] == "companies" and unquote(segments[-1]) in DIRECTORY_LETTERS:
+        return "directory"
+    return "company"